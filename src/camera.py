@@ -13,6 +13,9 @@ class Camera:
         # Camera position (top-left corner)
         self.x = 0
         self.y = 0
+
+        # Area of the level currently on screen, kept in sync by update()
+        self.viewport = pygame.Rect(0, 0, width, height)
         
     def update(self, target):
         """
@@ -29,6 +32,7 @@ class Camera:
         # Clamp camera position to level boundaries
         self.x = max(0, min(desired_x, self.level_width - self.width))
         self.y = max(0, min(desired_y, self.level_height - self.height))
+        self.viewport.topleft = (self.x, self.y)
     
     def apply(self, entity):
         """
@@ -47,3 +51,49 @@ class Camera:
                              entity.y - self.y, 
                              entity.width, 
                              entity.height)
+
+    def to_screen(self, x, y):
+        """
+        Convert a level position to a screen position.
+        Cheaper than apply() when only the position is needed - no Rect is created.
+        """
+        return (x - self.x, y - self.y)
+
+    def visible(self, rect, margin=0):
+        """
+        Check if a rect is on screen.
+
+        Args:
+            rect (pygame.Rect): Rect in level coordinates
+            margin (int, optional): Extra pixels around the screen that still
+                count as visible, for sprites drawn larger than their rect. Defaults to 0.
+
+        Returns:
+            bool: True if any part of the rect (grown by margin) is on screen
+        """
+        return self.visible_box(rect.x, rect.y, rect.width, rect.height, margin)
+
+    def visible_box(self, x, y, width, height, margin=0):
+        """visible() for a box given as numbers, so callers don't need a Rect."""
+        return (x + width > self.x - margin and x < self.x + self.width + margin and
+                y + height > self.y - margin and y < self.y + self.height + margin)
+
+    def iter_visible(self, index, margin=0):
+        """
+        Iterate over the on-screen items of a collection.
+
+        Args:
+            index: A spatial index with a query(rect) method (TileIndex, TileGrid),
+                which is asked for the viewport only, or any iterable of
+                rects / objects with a rect attribute, which is filtered
+            margin (int, optional): See visible(). Defaults to 0.
+
+        Yields:
+            Items that are on screen
+        """
+        if hasattr(index, 'query'):
+            yield from index.query(self.viewport.inflate(margin * 2, margin * 2))
+            return
+        for item in index:
+            if self.visible(item.rect if hasattr(item, 'rect') else item, margin):
+                yield item
@@ -2,100 +2,191 @@ import pygame
 import pygame.gfxdraw  # Add this for the anti-aliased circle drawing
 from utils.utils import load_image
 
+# (image, scroll factor) for each depth layer, back to front. The scroll
+# factor is how far a layer moves per pixel the player moves.
+DEFAULT_LAYERS = [
+    ('background.jpeg', 0.1),
+]
+
+
+class ParallaxLayer:
+    """
+    One depth layer of the parallax background.
+
+    The image is scaled to the screen height and tiled into a strip,
+    alternating with a mirrored copy so neighbouring tiles meet seamlessly.
+    The strip is one screen wider than the distance it repeats over, so any
+    scroll position is a single screen-sized area of it and drawing copies
+    exactly one screen of pixels.
+    """
+    def __init__(self, filename, screen_width, screen_height, factor):
+        """
+        Load and tile a layer.
+
+        Args:
+            filename (str): Image path relative to the assets folder
+            screen_width (int): Screen width in pixels
+            screen_height (int): Screen height in pixels
+            factor (float): Pixels the layer scrolls per pixel the player moves
+
+        Raises:
+            FileNotFoundError: If the image could not be loaded
+        """
+        self.factor = factor
+        self.screen_width = screen_width
+
+        # Decoded once; the scaled tile is made from the same surface
+        image = load_image(filename, use_alpha=True)
+        if image is None:
+            raise FileNotFoundError(filename)
+        # Only layers that need it keep per-pixel alpha; opaque ones blit faster
+        self.opaque = pygame.surfarray.pixels_alpha(image).min() == 255
+        width = max(1, round(image.get_width() * screen_height / image.get_height()))
+        tile = pygame.transform.scale(image, (width, screen_height))
+        tile = tile.convert() if self.opaque else tile.convert_alpha()
+
+        # Image, mirrored image, image, ... until a screen past one repeat
+        self.period = width * 2
+        tiles = (tile, pygame.transform.flip(tile, True, False))
+        strip_width = self.period + screen_width
+        if self.opaque:
+            self.strip = pygame.Surface((strip_width, screen_height)).convert()
+        else:
+            self.strip = pygame.Surface((strip_width, screen_height), pygame.SRCALPHA).convert_alpha()
+            self.strip.fill((0, 0, 0, 0))
+        for i, x in enumerate(range(0, strip_width, width)):
+            self.strip.blit(tiles[i % 2], (x, 0))
+        self.area = pygame.Rect(0, 0, screen_width, screen_height)
+
+    def get_offset(self, scroll_x):
+        """Get where the screen starts in the strip for a scroll position (in player pixels)."""
+        return int(scroll_x * self.factor) % self.period
+
+    def draw(self, surface, scroll_x):
+        """Draw the layer for a scroll position (in player pixels)."""
+        self.area.x = self.get_offset(scroll_x)
+        surface.blit(self.strip, (0, 0), self.area)
+
+
 class Background:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, layers=DEFAULT_LAYERS):
+        """
+        Create the parallax background.
+
+        Args:
+            screen_width (int): Screen width in pixels
+            screen_height (int): Screen height in pixels
+            layers (list, optional): (image, scroll factor) per depth layer,
+                back to front. Defaults to DEFAULT_LAYERS.
+        """
         self.screen_width = screen_width
         self.screen_height = screen_height
-        # Load background image
-        self.image = load_image('background.jpeg', use_alpha=False)
-        
+        # Load the layers, skipping any whose image is missing
+        self.layers = []
+        for filename, factor in layers:
+            try:
+                self.layers.append(ParallaxLayer(filename, screen_width, screen_height, factor))
+            except FileNotFoundError:
+                print(f"WARNING: Skipping background layer {filename}")
         # Default background color
         self.bg_color = (30, 30, 30)  # Dark gray
         
-        # Store level dimensions
-        #self.level_width = level_width
-        #self.level_height = level_height
-        
-        # If image loaded successfully
-        #if self.image:
-            # Scale to fit the level size - this could be a large image
-        #    self.image = pygame.transform.scale(self.image, (level_width, level_height))
-        
+    def get_offsets(self, scroll_x):
+        """
+        Get the offset of every layer for a scroll position, e.g. to tell
+        whether the background looks different from the last frame.
+
+        Args:
+            scroll_x (int): Scroll position in player pixels (player centre x)
+
+        Returns:
+            tuple: Offset into its strip per layer, empty without layers
+        """
+        return tuple(layer.get_offset(scroll_x) for layer in self.layers)
+
     def draw(self, surface, player_rect):
-        if self.image:
-            # Draw the background image
-            parallax_x = -player_rect.centerx * 0.1  # Adjust the multiplier for parallax effect
-            surface.blit(self.image, (parallax_x, 0))
+        if self.layers:
+            # Draw the layers back to front, each scrolled by its own factor
+            if not self.layers[0].opaque:
+                surface.fill(self.bg_color)
+            for layer in self.layers:
+                layer.draw(surface, player_rect.centerx)
         else:
             # Fallback to solid color
             surface.fill(self.bg_color)
 
-        #filter = pygame.surface.Surface((self.screen_width, self.screen_height))
-        #filter_color = (150, 150, 150, 0)
-        #filter.fill(filter_color)
-        
-        #for i in range(20):
-        #    radius = 150 - i * 5
-        #    color_value = 75 - i * 3
-        #    pygame.draw.circle(filter, (color_value, color_value, color_value, 0), (player_rect.centerx, player_rect.centery), radius)
-        #for i in range(5):
-            #trans = i * 30
-            #pygame.draw.circle(filter, (i, i, i, 0), (player_rect.centerx, player_rect.centery), i * 40)
-        #surface.blit(filter, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+# Light textures, keyed by (radius, falloff, colour, step). The gradient never
+# changes between frames, so each one is drawn once.
+_light_textures = {}
+# Full-screen darkness surface, reused every frame instead of reallocated
+_darkness_buffer = None
+
+LIGHT_RADIUS = 300  # Reduced radius for better performance
+LIGHT_STEP = 20     # Larger steps between circles for performance
+DARKNESS = (0, 0, 0, 180)  # Dark overlay with alpha for transparency
+
+
+def get_light_texture(radius=LIGHT_RADIUS, falloff=2, color=(255, 255, 255), step=LIGHT_STEP):
+    """
+    Get a radial light gradient, rendering it the first time it is asked for.
+
+    Args:
+        radius (int, optional): Radius of the light in pixels. Defaults to LIGHT_RADIUS.
+        falloff (float, optional): Exponent of the falloff curve, 2 is quadratic. Defaults to 2.
+        color (tuple, optional): RGB colour of the light. Defaults to white.
+        step (int, optional): Pixels between gradient rings. Defaults to LIGHT_STEP.
+
+    Returns:
+        pygame.Surface: (radius * 2) square SRCALPHA surface with the light centred on it
+    """
+    key = (radius, falloff, color, step)
+    light_surf = _light_textures.get(key)
+    if light_surf is not None:
+        return light_surf
+
+    # Create a surface for the light
+    light_surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+
+    # Generate a smooth radial gradient but with fewer iterations
+    # Use a quadratic falloff curve for a natural look with fewer circles
+    for ring_radius in range(radius, 0, -step):
+        # Calculate alpha based on distance from center using the falloff curve
+        distance_factor = ring_radius / radius
+        alpha = int(255 * (1 - distance_factor) ** falloff)
+
+        # Skip very faint circles
+        if alpha < 5:
+            continue
+
+        # Draw filled circle with current alpha
+        pygame.gfxdraw.filled_circle(light_surf, radius, radius, ring_radius, (*color, alpha))
+
+    # Add anti-aliasing for the outermost edge
+    pygame.gfxdraw.aacircle(light_surf, radius, radius, radius - 1, (*color, 30))
+
+    _light_textures[key] = light_surf
+    return light_surf
+
 
 def draw_overlay(width, height, screen, player_rect=None):
     """Draw a dark overlay with a light circle around the player to simulate lighting."""
-    # Create a semi-transparent dark surface for the overlay
-    overlay = pygame.Surface((width, height), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))  # Dark overlay with alpha for transparency
+    global _darkness_buffer
+
+    # Reuse the semi-transparent dark surface for the overlay
+    if _darkness_buffer is None or _darkness_buffer.get_size() != (width, height):
+        _darkness_buffer = pygame.Surface((width, height), pygame.SRCALPHA)
+    overlay = _darkness_buffer
+    overlay.fill(DARKNESS)
     
-    # If player position is provided, create a smooth light effect around them
+    # If player position is provided, cut a smooth light hole around them
     if player_rect:
-        # Center of the light effect (player's center)
-        center_x = player_rect.centerx
-        center_y = player_rect.centery
-        
-        # Performance optimization: Use a smaller, pre-rendered light texture
-        max_radius = 300  # Reduced radius for better performance
-        step_size = 20    # Larger steps between circles for performance
-        
-        # Create a surface for the light
-        light_surf = pygame.Surface((max_radius * 2, max_radius * 2), pygame.SRCALPHA)
-        
-        # Generate a smooth radial gradient but with fewer iterations
-        # Use a quadratic falloff curve for a natural look with fewer circles
-        for radius in range(max_radius, 0, -step_size):
-            # Calculate alpha based on distance from center using quadratic falloff
-            distance_factor = radius / max_radius
-            alpha = int(255 * (1 - distance_factor) ** 2)
-                
-            # Skip very faint circles
-            if alpha < 5:
-                continue
-                
-            # Draw filled circle with current alpha
-            pygame.gfxdraw.filled_circle(
-                light_surf,
-                max_radius,  # Center X
-                max_radius,  # Center Y
-                radius,
-                (255, 255, 255, alpha)  # Use alpha calculated from position
-            )
-            
-        # Add anti-aliasing for the outermost edge
-        pygame.gfxdraw.aacircle(
-            light_surf,
-            max_radius,
-            max_radius,
-            max_radius - 1,
-            (255, 255, 255, 30)
-        )
+        light_surf = get_light_texture()
         
         # Calculate position to blit the light (centered on player)
-        light_pos = (center_x - max_radius, center_y - max_radius)
+        light_pos = (player_rect.centerx - LIGHT_RADIUS, player_rect.centery - LIGHT_RADIUS)
         
         # Blit the light onto the overlay using BLEND_RGBA_SUB to create a "hole" in the darkness
         overlay.blit(light_surf, light_pos, special_flags=pygame.BLEND_RGBA_SUB)
 
     # Apply the overlay to the screen
-    screen.blit(overlay, (0, 0))
\ No newline at end of file
+    screen.blit(overlay, (0, 0))
@@ -19,8 +19,14 @@ class Enemy:
     along a set path. Enemies will reverse direction when they hit obstacles
     or reach the end of their patrol path.
     """
-    def __init__(self, x, y, width=64, height=64, patrol_distance=200, health=3):
-        """Initialize a new enemy"""
+    def __init__(self, x, y, width=64, height=64, patrol_distance=200, health=3, platforms=None):
+        """
+        Initialize a new enemy
+
+        Args:
+            platforms (PlatformSpans, optional): Walkable spans of the level,
+                used for ledge detection instead of probing the colliders
+        """
         # Position and dimensions
         self.rect = pygame.Rect(x, y, width, height)
         self.spawn_x = x
@@ -31,6 +37,16 @@ class Enemy:
         self.speed = 1
         self.patrol_distance = patrol_distance
         self.is_facing_right = self.direction > 0
+        self.look_ahead_dist = 10  # How far ahead to look for a ledge
+
+        # Ledge detection - see clamp_patrol
+        self.platforms = platforms
+        self.patrol_floor_y = None
+        self.patrol_floor_version = None
+        self.patrol_min_x = x - patrol_distance
+        self.patrol_max_x = x + patrol_distance
+        if platforms is not None:
+            self.clamp_patrol(platforms)
         
         # Physics variables
         self.vx = self.speed * self.direction
@@ -47,7 +63,9 @@ class Enemy:
         
         # ======================= ANIMATION SETUP - COMPLETELY NEW =======================
         # Create animation player - the ONLY animation system we'll use
-        self.animation_player = AnimationPlayer()
+        # Walkers share one clock for the walk cycle, so a crowd of them looks
+        # up its frame once per tick; attacks still start from their first frame
+        self.animation_player = AnimationPlayer(shared_clock={"walking"})
         
         # Load walking animation
         self.animation_player.load_aseprite_animation(
@@ -81,6 +99,32 @@ class Enemy:
         self.is_dead = False
         # ===============================================================================
     
+    def clamp_patrol(self, platforms):
+        """
+        Clamp the patrol range to the platform the enemy lands on after
+        spawning. While the enemy stands on that platform inside the clamped
+        range there is floor ahead in both directions, so the ledge check can
+        be skipped; elsewhere it is a lookup in the platform table.
+
+        Called again whenever the platform's row is rebuilt after a level
+        edit, so a hole dug into the platform is seen as a ledge.
+        """
+        width = self.rect.width
+        self.patrol_floor_y = None
+        self.patrol_min_x = self.spawn_x - self.patrol_distance
+        self.patrol_max_x = self.spawn_x + self.patrol_distance
+        landing = platforms.floor_below(self.rect.left, self.rect.right, self.rect.bottom)
+        if landing is None:
+            return
+        floor_y, span = landing
+        # Gaps narrower than the enemy never show up as a ledge ahead
+        left, right = platforms.reach(span, floor_y, width)
+        self.patrol_floor_y = floor_y
+        self.patrol_floor_version = platforms.version_at(floor_y)
+        # Last positions where the look-ahead still overlaps the platform
+        self.patrol_min_x = max(self.patrol_min_x, left - width + self.look_ahead_dist + 1)
+        self.patrol_max_x = min(self.patrol_max_x, right - self.look_ahead_dist - 1)
+
     def take_damage(self, amount=1):
         """Reduce health by the specified amount and check for death."""
         self.health -= amount
@@ -91,7 +135,7 @@ class Enemy:
             self.rect = (-1000, -1000, 10, 10)
         self.is_deadd = False
 
-    def update(self, tiles, player=None):
+    def update(self, tile_index, player=None):
         """Update enemy position, animation, and handle collisions"""
         # Player detection and state management
         if not self.is_dead:
@@ -131,46 +175,49 @@ class Enemy:
             # Move horizontally and handle collisions
             self.rect.x += self.vx
             horizontal_collision = False
-            for tile in tiles:
-                if self.rect.colliderect(tile.rect):
-                    horizontal_collision = True
-                    if self.vx > 0:  # moving right
-                        self.rect.right = tile.rect.left
-                        self.direction = -1
-                        self.is_facing_right = False
-                    elif self.vx < 0:  # moving left
-                        self.rect.left = tile.rect.right
-                        self.direction = 1
-                        self.is_facing_right = True
-                    self.debug_info["last_collision"] = "horizontal"
+            for solid in tile_index.colliding(self.rect):
+                horizontal_collision = True
+                if self.vx > 0:  # moving right
+                    self.rect.right = solid.left
+                    self.direction = -1
+                    self.is_facing_right = False
+                elif self.vx < 0:  # moving left
+                    self.rect.left = solid.right
+                    self.direction = 1
+                    self.is_facing_right = True
+                self.debug_info["last_collision"] = "horizontal"
             
             # Move vertically and handle collisions
             self.rect.y += self.vy
             self.on_ground = False
-            for tile in tiles:
-                if self.rect.colliderect(tile.rect):
-                    if self.vy > 0:  # falling down
-                        self.rect.bottom = tile.rect.top
-                        self.vy = 0
-                        self.on_ground = True
-                        self.debug_info["on_platform"] = True
-                        self.debug_info["last_collision"] = "vertical_bottom"
-                    elif self.vy < 0:  # moving up
-                        self.rect.top = tile.rect.bottom
-                        self.vy = 0
-                        self.debug_info["last_collision"] = "vertical_top"
+            for solid in tile_index.colliding(self.rect):
+                if self.vy > 0:  # falling down
+                    self.rect.bottom = solid.top
+                    self.vy = 0
+                    self.on_ground = True
+                    self.debug_info["on_platform"] = True
+                    self.debug_info["last_collision"] = "vertical_bottom"
+                elif self.vy < 0:  # moving up
+                    self.rect.top = solid.bottom
+                    self.vy = 0
+                    self.debug_info["last_collision"] = "vertical_top"
             
-            # Check for platform edges
-            if self.on_ground and not horizontal_collision:
-                look_ahead_dist = 10
-                check_x = self.rect.x + (look_ahead_dist * self.direction)
-                check_rect = pygame.Rect(check_x, self.rect.bottom, self.rect.width, 5)
+            # Check for platform edges (never needed inside the clamped patrol range)
+            if (self.patrol_floor_y is not None and
+                    self.platforms.version_at(self.patrol_floor_y) != self.patrol_floor_version):
+                # The level was edited around the patrol platform
+                self.clamp_patrol(self.platforms)
+            on_patrol_floor = (self.rect.bottom == self.patrol_floor_y
+                               and self.patrol_min_x <= self.rect.x <= self.patrol_max_x)
+            if self.on_ground and not horizontal_collision and not on_patrol_floor:
+                check_x = self.rect.x + (self.look_ahead_dist * self.direction)
                 
-                has_ground_ahead = False
-                for tile in tiles:
-                    if check_rect.colliderect(tile.rect):
-                        has_ground_ahead = True
-                        break
+                if self.platforms is not None:
+                    has_ground_ahead = self.platforms.has_floor(
+                        check_x, check_x + self.rect.width, self.rect.bottom)
+                else:
+                    check_rect = pygame.Rect(check_x, self.rect.bottom, self.rect.width, 5)
+                    has_ground_ahead = tile_index.collides_any(check_rect)
                 
                 if not has_ground_ahead:
                     self.direction *= -1
@@ -213,10 +260,15 @@ class Enemy:
         
         if not self.is_dead:
             """Draw the enemy with camera offset"""
+            # Nothing to draw when off screen (attack frames are a little
+            # wider than the rect, hence the margin)
+            if not camera.visible(self.rect, margin=16):
+                return
+            
             # Get camera-adjusted position
-            enemy_rect = camera.apply(self)
+            screen_pos = camera.to_screen(self.rect.x, self.rect.y)
             
             # ======================= DRAW ONLY USING ANIMATION PLAYER =======================
             # This is the ONLY drawing code - no direct surface blits or old animation code
-            self.animation_player.draw(surface, enemy_rect.topleft)
+            self.animation_player.draw(surface, screen_pos)
             # ===============================================================================
\ No newline at end of file
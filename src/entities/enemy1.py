@@ -13,10 +13,126 @@ else:
     from utils.utils import load_image, get_file_path, FILETYPE
 
 from utils.animationplayer import AnimationPlayer
+from fx.particles import ParticleEmitter
+
+class SlimeSprites:
+    """
+    Pre-rendered slime bodies and trail droplets for one slime colour.
+
+    Bodies are rendered over a grid of quantised (stretch_x, stretch_y) for
+    each projectile size, droplets over quantised (size, alpha), so drawing a
+    projectile is only lookups and blits. Anything outside the pre-rendered
+    range is rendered on first use and kept.
+    """
+    STRETCH_STEP = 0.1
+    STRETCH_RANGE = (0.8, 2.0)  # Wobble squashes to 0.8, falling stretches to about 2
+    DROPLET_STEP = 0.25
+    ALPHA_STEP = 16
+
+    _shared = {}  # colour -> SlimeSprites
+
+    @classmethod
+    def get(cls, color):
+        """Get the shared sprites for a colour."""
+        sprites = cls._shared.get(color)
+        if sprites is None:
+            sprites = cls(color)
+            cls._shared[color] = sprites
+        return sprites
+
+    def __init__(self, color):
+        self.color = color
+        self.bodies = {}  # (width, height) -> pygame.Surface
+        self.droplets = {}  # (size, alpha) -> pygame.Surface
+        self.prerendered = set()  # Projectile sizes already rendered
+
+    def prerender(self, base_sizes):
+        """
+        Render every body shape for the given projectile sizes, plus the
+        trail droplets they drop.
+        """
+        low, high = (round(limit / self.STRETCH_STEP) for limit in self.STRETCH_RANGE)
+        for base_size in base_sizes:
+            if base_size in self.prerendered:
+                continue
+            self.prerendered.add(base_size)
+            for step_x in range(low, high + 1):
+                for step_y in range(low, high + 1):
+                    self.body(base_size, step_x * self.STRETCH_STEP, step_y * self.STRETCH_STEP)
+            # Droplets are 0.2-0.4 of the projectile size
+            size = base_size * 0.2
+            while size <= base_size * 0.4 + self.DROPLET_STEP:
+                for alpha in range(0, 256 + self.ALPHA_STEP, self.ALPHA_STEP):
+                    self.droplet(size, alpha)
+                size += self.DROPLET_STEP
+
+    def body(self, base_size, stretch_x, stretch_y):
+        """Get the slime body for a size and stretch (quantised to STRETCH_STEP)."""
+        stretch_x = round(stretch_x / self.STRETCH_STEP) * self.STRETCH_STEP
+        stretch_y = round(stretch_y / self.STRETCH_STEP) * self.STRETCH_STEP
+        width = int(base_size * stretch_x * 2)
+        height = int(base_size * stretch_y * 2)
+        key = (width, height)
+        slime_surface = self.bodies.get(key)
+        if slime_surface is not None:
+            return slime_surface
+
+        # Create a surface for the slime with transparency
+        slime_surface = pygame.Surface((max(width, 0), max(height, 0)), pygame.SRCALPHA)
+        
+        # Draw the slime with an ellipse shape
+        ellipse_rect = pygame.Rect(0, 0, width, height)
+        
+        # Draw outer glow for slimy effect
+        glow_color = (self.color[0], self.color[1], self.color[2], 100)
+        pygame.draw.ellipse(slime_surface, glow_color, 
+                           pygame.Rect(-2, -2, width+4, height+4))
+        
+        # Draw main slime body
+        pygame.draw.ellipse(slime_surface, self.color, ellipse_rect)
+        
+        # Draw highlight to make it look wet/shiny
+        highlight_size = min(width, height) // 3
+        highlight_pos = (width // 4, height // 4)
+        pygame.draw.ellipse(slime_surface, 
+                           (220, 255, 220, 150),  # Lighter green with transparency
+                           pygame.Rect(highlight_pos[0], highlight_pos[1], 
+                                      highlight_size, highlight_size))
+
+        self.bodies[key] = slime_surface
+        return slime_surface
+
+    def droplet(self, size, alpha):
+        """
+        Get a trail droplet for a size and alpha (quantised).
+
+        Returns:
+            tuple: (pygame.Surface, quantised size)
+        """
+        size = max(self.DROPLET_STEP, round(size / self.DROPLET_STEP) * self.DROPLET_STEP)
+        alpha = min(255, round(alpha / self.ALPHA_STEP) * self.ALPHA_STEP)
+        key = (size, alpha)
+        glow = self.droplets.get(key)
+        if glow is None:
+            glow = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
+            pygame.draw.circle(glow, (*self.color, alpha), (size, size), size)
+            self.droplets[key] = glow
+        return glow, size
 
 class EnemyProjectile:
     """A gooey slime projectile fired by flying enemies"""
-    def __init__(self, x, y, vx, vy, size=8):
+    COLOR = (80, 230, 100)  # Slime green
+    SIZES = range(7, 11)  # Sizes fired by Enemy1
+
+    def __init__(self, x, y, vx, vy, size=8, trail=None):
+        """
+        Create a projectile.
+
+        Args:
+            trail (ParticleEmitter, optional): Emitter the slime drops its
+                trail droplets into, shared with the other projectiles of the
+                enemy that fired it. Defaults to None (a trail of its own).
+        """
         self.x = x
         self.y = y
         self.vx = vx
@@ -31,9 +147,11 @@ class EnemyProjectile:
         self.wobble_speed = 0.2
         self.stretch_x = 1.0
         self.stretch_y = 1.0
-        self.trail = []  # Stores positions for slime trail
+        self.color = self.COLOR
+        self.sprites = SlimeSprites.get(self.color)
+        # Slime trail droplets stay where they fall and fade out
+        self.trail = trail if trail is not None else ParticleEmitter(color=self.color)
         self.trail_timer = 0
-        self.color = (80, 230, 100)  # Slime green
         
     def update(self):
         # Previous position for trail
@@ -65,18 +183,9 @@ class EnemyProjectile:
             if random.random() < 0.3:  # 30% chance to drop
                 offset_x = random.uniform(-3, 3)
                 offset_y = random.uniform(-3, 3)
-                self.trail.append({
-                    'x': self.x + offset_x,
-                    'y': self.y + offset_y,
-                    'size': self.base_size * random.uniform(0.2, 0.4),
-                    'lifetime': 45  # Trail lasts less than the projectile
-                })
-                
-        # Update trail droplets
-        for droplet in self.trail[:]:
-            droplet['lifetime'] -= 1
-            if droplet['lifetime'] <= 0:
-                self.trail.remove(droplet)
+                self.trail.emit(self.x + offset_x, self.y + offset_y,
+                                size=self.base_size * random.uniform(0.2, 0.4),
+                                lifetime=45)  # Trail lasts less than the projectile
         
         # Update rect position
         actual_size = self.base_size * max(self.stretch_x, self.stretch_y)
@@ -90,52 +199,32 @@ class EnemyProjectile:
         # Return True if the projectile is still active
         return self.lifetime > 0
         
-    def draw(self, surface, camera):
-        # Draw trail first (behind the main blob)
-        for droplet in self.trail:
-            # Calculate position with camera offset
-            screen_x = int(droplet['x'] - camera.x)
-            screen_y = int(droplet['y'] - camera.y)
-            
-            # Fade out trail droplets based on remaining lifetime
-            alpha = int(255 * (droplet['lifetime'] / 45))
-            
-            # Draw trail droplet
-            glow = pygame.Surface((droplet['size']*2, droplet['size']*2), pygame.SRCALPHA)
-            pygame.draw.circle(glow, (*self.color, alpha), 
-                    (droplet['size'], droplet['size']), 
-                    droplet['size'])
-            surface.blit(glow, (screen_x - droplet['size'], screen_y - droplet['size']))
+    def emit_light(self, lightmap, camera):
+        """Add the slime's glow to a Lightmap."""
+        screen_x, screen_y = camera.to_screen(self.x, self.y)
+        lightmap.add_light(screen_x, screen_y, self.base_size * 6, 140)
         
-        # Calculate position with camera offset
-        screen_x = int(self.x - camera.x)
-        screen_y = int(self.y - camera.y)
-        
-        # Get stretched dimensions for the slime
+    def get_draw_rect(self):
+        """Get the level area covered by the slime body."""
         width = int(self.base_size * self.stretch_x * 2)
         height = int(self.base_size * self.stretch_y * 2)
+        return pygame.Rect(int(self.x) - width // 2 - 1, int(self.y) - height // 2 - 1,
+                           width + 2, height + 2)
         
-        # Create a surface for the slime with transparency
-        slime_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        
-        # Draw the slime with an ellipse shape
-        ellipse_rect = pygame.Rect(0, 0, width, height)
-        
-        # Draw outer glow for slimy effect
-        glow_color = (self.color[0], self.color[1], self.color[2], 100)
-        pygame.draw.ellipse(slime_surface, glow_color, 
-                           pygame.Rect(-2, -2, width+4, height+4))
+    def draw(self, surface, camera):
+        # The trail is drawn by whoever owns it (Enemy1 draws its shared
+        # trail behind all of its projectiles)
+        # Get the pre-rendered slime body for the current stretch
+        slime_surface = self.sprites.body(self.base_size, self.stretch_x, self.stretch_y)
+        width, height = slime_surface.get_size()
         
-        # Draw main slime body
-        pygame.draw.ellipse(slime_surface, self.color, ellipse_rect)
+        # Skip the body when it is off screen
+        if not camera.visible_box(self.x - width // 2, self.y - height // 2, width, height, margin=1):
+            return
         
-        # Draw highlight to make it look wet/shiny
-        highlight_size = min(width, height) // 3
-        highlight_pos = (width // 4, height // 4)
-        pygame.draw.ellipse(slime_surface, 
-                           (220, 255, 220, 150),  # Lighter green with transparency
-                           pygame.Rect(highlight_pos[0], highlight_pos[1], 
-                                      highlight_size, highlight_size))
+        # Calculate position with camera offset
+        screen_x = int(self.x - camera.x)
+        screen_y = int(self.y - camera.y)
         
         # Draw slime on main surface
         surface.blit(slime_surface, (screen_x - width//2, screen_y - height//2))
@@ -183,6 +272,12 @@ class Enemy1:
         
         # Projectiles list
         self.projectiles = []
+        # Trail droplets of all the projectiles, which fade out where they
+        # fell even after their projectile is gone
+        self.trail = ParticleEmitter(capacity=32, color=EnemyProjectile.COLOR)
+        self.slime_sprites = SlimeSprites.get(EnemyProjectile.COLOR)
+        # Render every slime shape up front rather than mid-fight
+        self.slime_sprites.prerender(EnemyProjectile.SIZES)
         
         # Animation setup
         self.animation_player = AnimationPlayer()
@@ -207,7 +302,7 @@ class Enemy1:
             self.is_dead = True
             play_audio_clip(get_file_path("hit.mp3", FILETYPE.AUDIO), 5)
 
-    def update(self, tiles, player=None):
+    def update(self, tile_index, player=None):
         """Update flying enemy position, animation, and handle player interaction"""
         # Update hover effect for natural flying movement
         if not self.is_dead:
@@ -312,27 +407,26 @@ class Enemy1:
                 self.attack_cooldown -= 1
             
             # Simple collision handling - just bounce off tiles
-            for tile in tiles:
-                if self.rect.colliderect(tile.rect):
-                    # Change direction if we hit something
-                    self.direction *= -1
-                    self.is_facing_right = not self.is_facing_right
+            for solid in tile_index.colliding(self.rect):
+                # Change direction if we hit something
+                self.direction *= -1
+                self.is_facing_right = not self.is_facing_right
+                
+                # Push outside of collision
+                if self.vx > 0:
+                    self.rect.right = solid.left
+                    self.pos_x = self.rect.x
+                elif self.vx < 0:
+                    self.rect.left = solid.right
+                    self.pos_x = self.rect.x
                     
-                    # Push outside of collision
-                    if self.vx > 0:
-                        self.rect.right = tile.rect.left
-                        self.pos_x = self.rect.x
-                    elif self.vx < 0:
-                        self.rect.left = tile.rect.right
-                        self.pos_x = self.rect.x
-                        
-                    if self.target_y > self.pos_y:
-                        self.rect.bottom = tile.rect.top
-                        self.pos_y = self.rect.y
-                    elif self.target_y < self.pos_y:
-                        self.rect.top = tile.rect.bottom
-                        self.pos_y = self.rect.y
-                    break
+                if self.target_y > self.pos_y:
+                    self.rect.bottom = solid.top
+                    self.pos_y = self.rect.y
+                elif self.target_y < self.pos_y:
+                    self.rect.top = solid.bottom
+                    self.pos_y = self.rect.y
+                break
             
             # Update animation
             self.animation_player.set_flip(flip_x=not self.is_facing_right)
@@ -342,12 +436,11 @@ class Enemy1:
             for projectile in self.projectiles[:]:
                 if not projectile.update():
                     self.projectiles.remove(projectile)
-                else:
-                    # Check for tile collisions
-                    for tile in tiles:
-                        if projectile.rect.colliderect(tile.rect):
-                            self.projectiles.remove(projectile)
-                            break
+                elif tile_index.collides_any(projectile.rect):
+                    # Projectile hit a tile
+                    self.projectiles.remove(projectile)
+            # Update trail droplets; faded ones are removed
+            self.trail.update()
             
             # Check for out of bounds
             if self.rect.y > 2000:
@@ -379,7 +472,8 @@ class Enemy1:
             self.rect.centery,
             dx * 4,  # Speed in x direction (slightly slower)
             dy * 4,  # Speed in y direction (slightly slower)
-            size=random.randint(7, 10)  # Random size for variety
+            size=random.randint(7, 10),  # Random size for variety
+            trail=self.trail
         )
         
         # Add to projectiles list
@@ -407,25 +501,55 @@ class Enemy1:
                 
         return False
     
+    def get_droplet_sprite(self, size, color, alpha):
+        """Pre-rendered trail droplet for ParticleEmitter.draw_sprites."""
+        return self.slime_sprites.droplet(size, alpha)
+
+    def get_trail_rects(self, camera):
+        """Get the screen area of each trail droplet, e.g. to mark as dirty."""
+        return self.trail.get_rects(camera.x, camera.y, margin=2)
+
+    def emit_light(self, lightmap, camera):
+        """Add the glow of the projectiles and of a charging attack to a Lightmap."""
+        if self.is_dead:
+            return
+        for projectile in self.projectiles:
+            projectile.emit_light(lightmap, camera)
+        if self.state == "attacking" and self.fire_delay > 0:
+            # Grows with the charge glow drawn in draw()
+            charge_radius = 10 + (20 - self.fire_delay) // 2
+            alpha = min(255, (20 - self.fire_delay) * 12)
+            screen_x, screen_y = camera.to_screen(self.rect.centerx, self.rect.centery)
+            lightmap.add_light(screen_x, screen_y, charge_radius * 4, alpha)
+    
     def draw(self, surface, camera):
         if not self.is_dead:
             """Draw the enemy and its projectiles with camera offset"""
+            # The sprite and charge glow both fit inside the rect. Projectiles
+            # are still drawn when the enemy is off screen - they cull themselves.
+            on_screen = camera.visible(self.rect)
+            
             # Get camera-adjusted position
-            enemy_rect = camera.apply(self)
+            screen_x, screen_y = camera.to_screen(self.rect.x, self.rect.y)
             
             # Draw using animation player
-            self.animation_player.draw(surface, enemy_rect.topleft)
+            if on_screen:
+                self.animation_player.draw(surface, (screen_x, screen_y))
+            
+            # Draw the trail droplets behind all projectiles; they fade
+            # out over their lifetime
+            self.trail.draw_sprites(surface, self.get_droplet_sprite, camera=camera)
             
             # Draw all projectiles
             for projectile in self.projectiles:
                 projectile.draw(surface, camera)
                 
             # Visual indicator for attack charging (optional)
-            if self.state == "attacking" and self.fire_delay > 0:
+            if on_screen and self.state == "attacking" and self.fire_delay > 0:
                 # Draw charging effect
                 charge_radius = 10 + (20 - self.fire_delay) // 2
-                center_x = enemy_rect.centerx
-                center_y = enemy_rect.centery
+                center_x = screen_x + self.rect.width // 2
+                center_y = screen_y + self.rect.height // 2
                 
                 # Create transparent surface for the glow
                 glow = pygame.Surface((charge_radius*2, charge_radius*2), pygame.SRCALPHA)
@@ -9,25 +9,23 @@ from utils.utils import FILETYPE, load_image, get_file_path
 
 from camera import Camera
 from utils.animationplayer import AnimationPlayer
-from healthBar import HealthBar  # Updated import statement
+from healthBar import HealthBar, get_font  # Updated import statement
 from fx.hiteffect import HitEffect
-
-class Particle:
-    def __init__(self, pos):
-        self.x, self.y = pos
-        self.size = random.randint(2, 5)
-        self.color = (200, 200, 200)
-        self.lifetime = random.randint(20, 50)
-        self.velocity = [random.uniform(-1, 1), random.uniform(-1, 1)]
-
-    def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-        self.lifetime -= 1
-        self.size -= 0.1
-
-    def draw(self, surface):
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), int(self.size))
+from fx.particles import ParticleEmitter
+
+def create_footstep_particles():
+    """
+    Emitter for the dust kicked up by footsteps. Dust drifts, shrinks by 0.1
+    a frame and disappears once it is too small to draw.
+    """
+    return ParticleEmitter(color=(200, 200, 200), size_shrink=0.1, expire=False, min_size=1)
+
+def emit_footstep_particle(particles, pos):
+    """Add one puff of footstep dust at a position."""
+    x, y = pos
+    size = random.randint(2, 5)
+    lifetime = random.randint(20, 50)
+    particles.emit(x, y, random.uniform(-1, 1), random.uniform(-1, 1), size, lifetime)
 
 class FootStepAudioPlayer:
     def __init__(self):
@@ -53,8 +51,10 @@ class FootStepAudioPlayer:
 class Sword:
     def __init__(self, x, y, x_offset, y_offset, camera: Camera, enemies):
 
-        self.sword_idle = load_image('images/sword/Sword-Idle.png')
-        self.sword_attack = load_image('images/sword/Sword-Attack.png')
+        # Sheets are loaded at the size they are drawn at (served from the
+        # texture atlas), so frames are regions of them instead of scaled copies
+        self.sword_idle = load_image('images/sword/Sword-Idle.png', size=(16 * 6 * 3, 16 * 3))
+        self.sword_attack = load_image('images/sword/Sword-Attack.png', size=(16 * 6 * 3, 16 * 3))
 
         self.x = x
         self.y = y
@@ -63,14 +63,12 @@ class Sword:
 
         self.sword_idle_frames = []
         for i in range(6):
-            frame = self.sword_idle.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 3, 16 * 3))  # Scale up the sword to be bigger
+            frame = self.sword_idle.subsurface(pygame.Rect(i * 16 * 3, 0, 16 * 3, 16 * 3))
             self.sword_idle_frames.append(frame)
         
         self.sword_attack_frames = []
         for i in range(6):
-            frame = self.sword_attack.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 3, 16 * 3))  # Scale up the sword to be bigger
+            frame = self.sword_attack.subsurface(pygame.Rect(i * 16 * 3, 0, 16 * 3, 16 * 3))
             self.sword_attack_frames.append(frame)
         
 
@@ -131,51 +129,48 @@ class Player:
         self.spawn_x = x
         self.spawn_y = y
         
-        # Load the player sprite from assets folder
-        self.footstep_particles = []
-        self.normal_idle = load_image('images/player/Normal-Idle.png')
-        self.normal_moving = load_image('images/player/Normal-Moving.png')
-        self.demon_idle = load_image('images/player/Demon-Idle.png')
-        self.demon_moving = load_image('images/player/Demon-Moving.png')
+        # Load the player sprite from assets folder, at the size it is drawn at
+        # (served from the texture atlas) so frames are regions of the sheets
+        self.footstep_particles = create_footstep_particles()
+        self.normal_idle = load_image('images/player/Normal-Idle.png', size=(16 * 6 * 4, 16 * 4))
+        self.normal_moving = load_image('images/player/Normal-Moving.png', size=(16 * 6 * 4, 16 * 4))
+        self.demon_idle = load_image('images/player/Demon-Idle.png', size=(16 * 6 * 4, 16 * 4))
+        self.demon_moving = load_image('images/player/Demon-Moving.png', size=(16 * 6 * 4, 16 * 4))
 
         if self.normal_idle is None:
-            self.normal_idle = pygame.Surface((16 * 6, 16))
+            self.normal_idle = pygame.Surface((16 * 6 * 4, 16 * 4))
             self.normal_idle.fill((255, 255, 255))
 
         if self.normal_moving is None:
-            self.normal_moving = pygame.Surface((16 * 6, 16))
+            self.normal_moving = pygame.Surface((16 * 6 * 4, 16 * 4))
             self.normal_moving.fill((255, 255, 255))
         
         if self.demon_idle is None:
-            self.demon_idle = pygame.Surface((16 * 6, 16))
+            self.demon_idle = pygame.Surface((16 * 6 * 4, 16 * 4))
             self.demon_idle.fill((255, 255, 255))
         
         if self.demon_moving is None:
-            self.demon_moving = pygame.Surface((16 * 6, 16))
+            self.demon_moving = pygame.Surface((16 * 6 * 4, 16 * 4))
             self.demon_moving.fill((255, 255, 255))
         
         self.normal_idle_frames = []
         for i in range(6):
-            frame = self.normal_idle.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 4, 16 * 4))
+            frame = self.normal_idle.subsurface(pygame.Rect(i * 16 * 4, 0, 16 * 4, 16 * 4))
             self.normal_idle_frames.append(frame)
         
         self.normal_moving_frames = []
         for i in range(6):
-            frame = self.normal_moving.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 4, 16 * 4))
+            frame = self.normal_moving.subsurface(pygame.Rect(i * 16 * 4, 0, 16 * 4, 16 * 4))
             self.normal_moving_frames.append(frame)
         
         self.demon_idle_frames = []
         for i in range(6):
-            frame = self.demon_idle.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 4, 16 * 4))
+            frame = self.demon_idle.subsurface(pygame.Rect(i * 16 * 4, 0, 16 * 4, 16 * 4))
             self.demon_idle_frames.append(frame)
         
         self.demon_moving_frames = []
         for i in range(6):
-            frame = self.demon_moving.subsurface(pygame.Rect(i * 16, 0, 16, 16))
-            frame = pygame.transform.scale(frame, (16 * 4, 16 * 4))
+            frame = self.demon_moving.subsurface(pygame.Rect(i * 16 * 4, 0, 16 * 4, 16 * 4))
             self.demon_moving_frames.append(frame)
         
         self.current_frame = 0
@@ -328,34 +323,33 @@ class Player:
         """Apply gravity to vy."""
         self.vy += self.GRAVITY
 
-    def move_and_collide(self, tiles):
+    def move_and_collide(self, tile_index):
         """
         Move the player by (vx, vy). Then check collision with tiles.
         We'll handle x and y axes separately for reliable collisions.
+        Only the tiles in grid cells around the player are tested.
         """
         # Move horizontally
         self.rect.x += self.vx
         # Check collisions on the X axis
-        for tile in tiles:
-            if self.rect.colliderect(tile.rect):
-                if self.vx > 0:  # moving right
-                    self.rect.right = tile.rect.left
-                elif self.vx < 0:  # moving left
-                    self.rect.left = tile.rect.right
+        for solid in tile_index.colliding(self.rect):
+            if self.vx > 0:  # moving right
+                self.rect.right = solid.left
+            elif self.vx < 0:  # moving left
+                self.rect.left = solid.right
 
         # Move vertically
         self.rect.y += self.vy
         # Check collisions on the Y axis
         self.on_ground = False  # We'll set this to True if we land on something
-        for tile in tiles:
-            if self.rect.colliderect(tile.rect):
-                if self.vy > 0:  # falling down
-                    self.rect.bottom = tile.rect.top
-                    self.vy = 0
-                    self.on_ground = True
-                elif self.vy < 0:  # moving up
-                    self.rect.top = tile.rect.bottom
-                    self.vy = 0
+        for solid in tile_index.colliding(self.rect):
+            if self.vy > 0:  # falling down
+                self.rect.bottom = solid.top
+                self.vy = 0
+                self.on_ground = True
+            elif self.vy < 0:  # moving up
+                self.rect.top = solid.bottom
+                self.vy = 0
     
     def check_death(self, level_height, death_zones=None):
         """Check if player has died from falling or hitting a death zone."""
@@ -387,7 +381,7 @@ class Player:
         self.health = self.max_health  # Reset health upon respawn
         # You could add spawn animation or invulnerability frames here
     
-    def update(self, tiles):
+    def update(self, tile_index):
             
         if self.is_dead:
             self.respawn_timer += 1
@@ -401,7 +395,7 @@ class Player:
             self.apply_gravity()
 
             # 3. Move and collide
-            self.move_and_collide(tiles)
+            self.move_and_collide(tile_index)
 
             # 4. Update animation frame
             self.animation_timer += pygame.time.get_ticks() - self.last_update_time
@@ -412,7 +406,7 @@ class Player:
                 self.image = self.current_frames[self.current_frame]
                 if self.is_moving and self.on_ground:
                     self.footstep_audio_player.play()
-                    self.footstep_particles.append(Particle((self.rect.centerx, self.rect.bottom)))
+                    emit_footstep_particle(self.footstep_particles, (self.rect.centerx, self.rect.bottom))
             
             self.sword.update(self.rect, self.is_facing_right)
         
@@ -453,8 +447,7 @@ class Player:
             face_x += self.health_face_image.get_width() + face_spacing
 
         # Draw the health text below the health bar
-        font = pygame.font.Font(None, 24)
-        health_text = font.render(f'Health: {self.health}/{self.max_health}', True, (255, 255, 255))
+        health_text = get_font().render(f'Health: {self.health}/{self.max_health}', True, (255, 255, 255))
         text_rect = health_text.get_rect()
         text_rect.topleft = (bar_x, bar_y + self.health_bar_image.get_height() + 5)
         surface.blit(health_text, text_rect)
@@ -463,9 +456,8 @@ class Player:
         render_rect = self.camera.apply(self)
         surface.blit(pygame.transform.flip(self.image, not self.is_facing_right, False), render_rect.topleft)
         self.sword.draw(surface, self.is_facing_right)
-        for particle in self.footstep_particles:
-            particle.update()
-            particle.draw(surface)
+        self.footstep_particles.update()
+        self.footstep_particles.draw_circles(surface)
         self.health_bar.update_health(self.health)
         self.health_bar.draw(surface)  # Ensure this method is called to draw the health bar
 
@@ -4,16 +4,13 @@ from utils.utils import load_image
 class Tile:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
-        # Load tile image
-        self.image = load_image('stile.png')
+        # Load tile image already scaled to the tile size. The surface comes
+        # from the shared texture cache, so every tile references the same one.
+        self.image = load_image('stile.png', size=(width, height))
         
         # Default tile color as fallback
         self.color = (100, 100, 100)  # Gray
         
-        # If image loaded successfully, scale it to match the tile size
-        if self.image:
-            self.image = pygame.transform.scale(self.image, (width, height))
-        
     def draw(self, surface, camera_x=0, camera_y=0):
         """Draw the tile with camera offset applied."""
         draw_rect = pygame.Rect(
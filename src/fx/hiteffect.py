@@ -2,6 +2,38 @@ import pygame
 import random
 import math
 
+from fx.particles import ParticleEmitter
+
+# Pre-rendered particle dots, keyed by (size bucket, colour, alpha bucket).
+# Shared by all hit effects so drawing a particle is just a blit.
+_dot_cache = {}
+SIZE_STEP = 0.5  # Particle sizes are rounded to half pixels
+ALPHA_STEP = 16  # and alphas to 16 levels
+
+def get_glow_dot(size, color, alpha):
+    """
+    Get a pre-rendered particle dot.
+
+    Args:
+        size (float): Radius of the dot
+        color (tuple): RGB colour
+        alpha (int): Opacity, 0-255
+
+    Returns:
+        tuple: (pygame.Surface, quantised radius) - blit the surface at the
+        particle position minus the radius
+    """
+    size = max(SIZE_STEP, round(size / SIZE_STEP) * SIZE_STEP)
+    alpha = min(255, round(alpha / ALPHA_STEP) * ALPHA_STEP)
+    key = (size, color, alpha)
+    dot = _dot_cache.get(key)
+    if dot is None:
+        # Create a surface for the particle with alpha
+        dot = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.circle(dot, (*color, alpha), (size, size), size)
+        _dot_cache[key] = dot
+    return dot, size
+
 class HitEffect:
     """
     Class that represents a hit effect animation displayed when the player takes damage.
@@ -10,7 +42,8 @@ class HitEffect:
     def __init__(self, x, y, color=(255, 0, 0)):
         self.x = x
         self.y = y
-        self.particles = []
+        # Sparks shrink by 5% a frame and fade out over their lifetime
+        self.particles = ParticleEmitter(capacity=15, color=color, size_decay=0.95)
         self.lifetime = 20  # Effect lasts for 20 frames
         self.current_frame = 0
         self.color = color
@@ -31,61 +64,29 @@ class HitEffect:
             vx = math.cos(angle) * speed
             vy = math.sin(angle) * speed
             
-            # Add particle to list
-            self.particles.append({
-                'x': self.x,
-                'y': self.y,
-                'vx': vx,
-                'vy': vy,
-                'size': size,
-                'lifetime': lifetime,
-                'max_lifetime': lifetime
-            })
+            # Add particle to the emitter
+            self.particles.emit(self.x, self.y, vx, vy, size, lifetime)
     
     def update(self):
         """Update the hit effect animation"""
         self.current_frame += 1
         
-        # Update each particle
-        for particle in self.particles:
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            
-            # Gradually reduce size as lifetime decreases
-            particle['size'] *= 0.95
-            
-            # Decrease lifetime
-            particle['lifetime'] -= 1
+        # Move, shrink and age every particle; expired ones are removed
+        self.particles.update()
     
     def draw(self, surface, camera=None):
         """Draw the hit effect on the given surface"""
-        for particle in self.particles:
-            # Skip particles that have expired
-            if particle['lifetime'] <= 0:
-                continue
-                
-            # Calculate alpha (fade out)
-            alpha = int(255 * (particle['lifetime'] / particle['max_lifetime']))
-            
-            # Calculate position with camera offset if provided
-            x, y = particle['x'], particle['y']
-            if camera:
-                x -= camera.x
-                y -= camera.y
-                
-            # Create a surface for the particle with alpha
-            particle_surface = pygame.Surface((particle['size'] * 2, particle['size'] * 2), pygame.SRCALPHA)
-            
-            # Draw the particle
-            pygame.draw.circle(
-                particle_surface, 
-                (*self.color, alpha),  # Color with alpha
-                (particle['size'], particle['size']), 
-                particle['size']
-            )
-            
-            # Draw the particle on the main surface
-            surface.blit(particle_surface, (x - particle['size'], y - particle['size']))
+        # Cached dots for each size, colour and alpha (fading out over the
+        # lifetime), offset and culled by the camera if provided
+        self.particles.draw_sprites(surface, get_glow_dot, camera=camera)
+    
+    def get_draw_rect(self):
+        """
+        Get the area the effect can draw into, in the same coordinates as x/y.
+        Particles move at most 3 pixels a frame and are at most 5 pixels wide.
+        """
+        reach = 3 * self.lifetime + 6
+        return pygame.Rect(int(self.x) - reach, int(self.y) - reach, reach * 2, reach * 2)
     
     def is_finished(self):
         """Check if the effect has completed its animation"""
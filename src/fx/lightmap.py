@@ -0,0 +1,149 @@
+import pygame
+from entities.background import get_light_texture, DARKNESS
+
+class Lightmap:
+    """
+    Darkness overlay lit by any number of point lights.
+
+    Lights are accumulated into a buffer at a fraction of the screen
+    resolution (a quarter by default), which is then smooth-scaled up and
+    blitted over the screen once. The cost per light depends on the size of
+    its texture in the small buffer, so dozens of small lights are cheap.
+
+    With occluders, lights are masked by their visibility polygon so solid
+    tiles cast shadows.
+    """
+    def __init__(self, width, height, scale=4, darkness=DARKNESS[3], occluders=None):
+        """
+        Create a lightmap for a screen.
+
+        Args:
+            width (int): Screen width in pixels
+            height (int): Screen height in pixels
+            scale (int, optional): Screen pixels per lightmap pixel. Defaults to 4.
+            darkness (int, optional): Alpha of the unlit overlay. Defaults to 180.
+            occluders (Occluders, optional): Level walls that cast shadows. Defaults to None.
+        """
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.darkness = (0, 0, 0, darkness)
+        self.occluders = occluders
+        # Light bleeds this far into the walls it hits, so the faces of lit
+        # platforms aren't left in their own shadow
+        self.wall_glow = occluders.tile_size // 2 if occluders else 0
+
+        buffer_width = -(-width // scale)
+        buffer_height = -(-height // scale)
+        self.buffer = pygame.Surface((buffer_width, buffer_height), pygame.SRCALPHA)
+        self.overlay = pygame.Surface((buffer_width * scale, buffer_height * scale), pygame.SRCALPHA)
+
+        self.lights = []  # (x, y, radius, intensity, shadows) queued for the next render
+        self.lit = {}  # (buffer position, texture key, polygon, duplicate) -> screen rect, for the last render
+        self.changed_rects = []  # Screen rects whose lighting changed in the last render, blur included
+        self.textures = {}  # (buffer radius, intensity bucket) -> pygame.Surface
+        self.masks = {}  # texture size -> scratch surface for shadowed lights
+
+    def add_light(self, x, y, radius, intensity=255, shadows=True):
+        """
+        Queue a light for this frame. Lights entirely off screen are dropped.
+
+        Args:
+            x (int): Screen x of the light's centre
+            y (int): Screen y of the light's centre
+            radius (int): Radius in screen pixels
+            intensity (int, optional): How much darkness the centre removes, 0-255. Defaults to 255.
+            shadows (bool, optional): Whether walls block this light. Defaults to True.
+        """
+        if (x + radius <= 0 or x - radius >= self.width or
+                y + radius <= 0 or y - radius >= self.height):
+            return
+        self.lights.append((x, y, radius, intensity, shadows))
+
+    def _texture_key(self, radius, intensity):
+        """Get the (buffer radius, intensity bucket) a light is drawn with, or None if invisible."""
+        buffer_radius = max(1, int(radius) // self.scale)
+        # 16 intensity levels keep the cache small for fading lights
+        bucket = min(255, int(intensity + 8) // 17 * 17)
+        if bucket <= 0:
+            return None
+        return (buffer_radius, bucket)
+
+    def _texture(self, key):
+        """Get the light texture for a texture key."""
+        texture = self.textures.get(key)
+        if texture is None:
+            # About 15 gradient rings whatever the size, like the player's light
+            buffer_radius, bucket = key
+            step = max(1, round(buffer_radius / 15))
+            texture = get_light_texture(buffer_radius, step=step)
+            if bucket < 255:
+                texture = texture.copy()
+                texture.fill((255, 255, 255, bucket), special_flags=pygame.BLEND_RGBA_MULT)
+            self.textures[key] = texture
+        return texture
+
+    def _shadowed(self, texture, position, polygon, camera):
+        """Mask a light texture with its visibility polygon (in level coordinates)."""
+        mask = self.masks.get(texture.get_size())
+        if mask is None:
+            mask = pygame.Surface(texture.get_size(), pygame.SRCALPHA)
+            self.masks[texture.get_size()] = mask
+        mask.fill((0, 0, 0, 0))
+
+        # Level coordinates -> coordinates on the mask
+        offset_x = camera.x + position[0] * self.scale
+        offset_y = camera.y + position[1] * self.scale
+        points = [((point_x - offset_x) / self.scale, (point_y - offset_y) / self.scale)
+                  for point_x, point_y in polygon]
+        pygame.draw.polygon(mask, (255, 255, 255, 255), points)
+        glow = max(1, round(self.wall_glow * 2 / self.scale))
+        pygame.draw.lines(mask, (255, 255, 255, 255), True, points, glow)
+
+        mask.blit(texture, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        return mask
+
+    def render(self, screen, camera=None):
+        """
+        Draw the darkness with all queued lights cut out of it, then clear the queue.
+
+        Args:
+            screen (pygame.Surface): Surface to draw the overlay on
+            camera (Camera, optional): Camera the light positions are relative to.
+                Needed for shadows. Defaults to None.
+        """
+        self.buffer.fill(self.darkness)
+        lit = {}
+        for x, y, radius, intensity, shadows in self.lights:
+            key = self._texture_key(radius, intensity)
+            if key is None:
+                continue
+            texture = self._texture(key)
+            half = texture.get_width() // 2
+            position = (int(x) // self.scale - half, int(y) // self.scale - half)
+
+            polygon = None
+            if shadows and self.occluders is not None and camera is not None:
+                polygon = self.occluders.visibility(x + camera.x, y + camera.y, radius)
+            if polygon is not None:
+                texture = self._shadowed(texture, position, polygon, camera)
+            area = self.buffer.blit(texture, position, special_flags=pygame.BLEND_RGBA_SUB)
+
+            # Identical lights on top of each other are counted separately
+            light = (position, key, polygon, 0)
+            while light in lit:
+                light = (position, key, polygon, light[3] + 1)
+            # Smooth scaling blurs each light about one buffer pixel past its
+            # footprint, so the screen area it changes is that much bigger
+            rect = pygame.Rect(area.x * self.scale, area.y * self.scale,
+                               area.width * self.scale, area.height * self.scale)
+            lit[light] = rect.inflate(self.scale * 2, self.scale * 2)
+        self.lights.clear()
+
+        # Lights that appeared, moved, faded or went away since the last render
+        self.changed_rects = ([rect for light, rect in lit.items() if light not in self.lit] +
+                              [rect for light, rect in self.lit.items() if light not in lit])
+        self.lit = lit
+
+        pygame.transform.smoothscale(self.buffer, self.overlay.get_size(), self.overlay)
+        screen.blit(self.overlay, (0, 0))
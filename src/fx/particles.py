@@ -0,0 +1,341 @@
+"""
+Vectorised particle engine.
+
+A ParticleEmitter stores its particles as a struct of NumPy arrays (position,
+velocity, size, lifetime and colour) instead of one Python object per
+particle. update() moves the whole emitter with array operations and
+compacts dead particles with a mask, so a few thousand particles cost about
+the same as a few dozen.
+
+The behaviour of an emitter is set by its configuration (drag, gravity,
+shrinking, wandering, wrapping and when particles die), so the game's
+particle effects are all emitters with different settings:
+
+- footstep dust (Player): shrinks by 0.1 a frame, dies when too small to draw
+- hit sparks (HitEffect): shrinks by 5% a frame, fades out over its lifetime
+- slime droplets (Enemy1, shared by its projectiles): stays put, fades out over its lifetime
+- fireflies (FireflyParticleSystem): wanders, wraps around the screen, never dies
+"""
+
+import math
+
+import numpy as np
+import pygame
+
+# Shared by all emitters that don't bring their own generator
+_rng = np.random.default_rng()
+
+
+class ParticleEmitter:
+    """
+    A group of particles that share one behaviour.
+    """
+    # (array attribute, extra dimensions, dtype) of the per-particle arrays
+    FIELDS = (
+        ('_x', (), np.float64),
+        ('_y', (), np.float64),
+        ('_vx', (), np.float64),
+        ('_vy', (), np.float64),
+        ('_size', (), np.float64),
+        ('_lifetime', (), np.float64),
+        ('_max_lifetime', (), np.float64),
+        ('_color', (3,), np.uint8),
+    )
+
+    def __init__(self, capacity=32, color=(255, 255, 255), drag=1.0, gravity=0.0,
+                 size_decay=1.0, size_shrink=0.0, wander=0.0, wrap=None,
+                 expire=True, min_size=0.0, rng=None):
+        """
+        Create an empty emitter.
+
+        Args:
+            capacity (int, optional): Particles to allocate room for up front;
+                the arrays grow as needed. Defaults to 32.
+            color (tuple, optional): RGB colour of particles emitted without one.
+                Defaults to white.
+            drag (float, optional): Velocity multiplier per frame. Defaults to 1.0.
+            gravity (float, optional): Added to the y velocity every frame. Defaults to 0.0.
+            size_decay (float, optional): Size multiplier per frame. Defaults to 1.0.
+            size_shrink (float, optional): Subtracted from the size every frame. Defaults to 0.0.
+            wander (float, optional): Largest random turn of the velocity per
+                frame, in radians. Defaults to 0.0.
+            wrap (tuple, optional): (width, height) to wrap positions around
+                instead of letting particles leave. Defaults to None.
+            expire (bool, optional): Whether particles die when their lifetime
+                runs out. Defaults to True.
+            min_size (float, optional): Particles whose size drops below this
+                die. Defaults to 0.0.
+            rng (numpy.random.Generator, optional): Random numbers for wandering.
+                Defaults to a shared generator.
+        """
+        self.color = color
+        self.drag = drag
+        self.gravity = gravity
+        self.size_decay = size_decay
+        self.size_shrink = size_shrink
+        self.wander = wander
+        self.wrap = wrap
+        self.expire = expire
+        self.min_size = min_size
+        self.rng = rng if rng is not None else _rng
+
+        self.count = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        """(Re)allocate the arrays for a capacity, keeping the live particles."""
+        for name, columns, dtype in self.FIELDS:
+            array = np.zeros((capacity,) + columns, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.count] = old[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    # Views of the live particles; writes go straight into the emitter
+    @property
+    def x(self):
+        return self._x[:self.count]
+
+    @property
+    def y(self):
+        return self._y[:self.count]
+
+    @property
+    def vx(self):
+        return self._vx[:self.count]
+
+    @property
+    def vy(self):
+        return self._vy[:self.count]
+
+    @property
+    def size(self):
+        return self._size[:self.count]
+
+    @property
+    def lifetime(self):
+        return self._lifetime[:self.count]
+
+    @property
+    def max_lifetime(self):
+        return self._max_lifetime[:self.count]
+
+    @property
+    def color_array(self):
+        return self._color[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, vx=0.0, vy=0.0, size=1.0, lifetime=1, color=None):
+        """
+        Add one particle.
+
+        Args:
+            x (float): X position
+            y (float): Y position
+            vx (float, optional): X velocity per frame. Defaults to 0.0.
+            vy (float, optional): Y velocity per frame. Defaults to 0.0.
+            size (float, optional): Radius. Defaults to 1.0.
+            lifetime (int, optional): Frames until the particle expires. Defaults to 1.
+            color (tuple, optional): RGB colour. Defaults to the emitter's colour.
+        """
+        self.emit_many(x, y, vx, vy, size, lifetime, color, count=1)
+
+    def emit_many(self, x, y, vx=0.0, vy=0.0, size=1.0, lifetime=1, color=None, count=None):
+        """
+        Add several particles at once. Every argument can be a number shared
+        by all the new particles or an array with one value per particle.
+
+        Args:
+            count (int, optional): Number of particles; taken from the array
+                arguments if not given.
+
+        Returns:
+            slice: Where the new particles are in the arrays
+        """
+        if count is None:
+            count = max(np.size(value) for value in (x, y, vx, vy, size, lifetime))
+        if count <= 0:
+            return slice(self.count, self.count)
+        if self.count + count > self.capacity:
+            self._allocate(max(self.capacity * 2, self.count + count))
+
+        new = slice(self.count, self.count + count)
+        self._x[new] = x
+        self._y[new] = y
+        self._vx[new] = vx
+        self._vy[new] = vy
+        self._size[new] = size
+        self._lifetime[new] = lifetime
+        self._max_lifetime[new] = lifetime
+        self._color[new] = self.color if color is None else color
+        self.count += count
+        return new
+
+    def update(self):
+        """Move every particle one frame and remove the dead ones."""
+        if not self.count:
+            return
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+
+        if self.wander:
+            # Turn each velocity by a small random angle
+            turn = self.rng.uniform(-self.wander, self.wander, self.count)
+            cos, sin = np.cos(turn), np.sin(turn)
+            vx[:], vy[:] = vx * cos - vy * sin, vx * sin + vy * cos
+
+        x += vx
+        y += vy
+        if self.wrap is not None:
+            np.mod(x, self.wrap[0], out=x)
+            np.mod(y, self.wrap[1], out=y)
+
+        if self.drag != 1.0:
+            vx *= self.drag
+            vy *= self.drag
+        if self.gravity:
+            vy += self.gravity
+
+        size = self.size
+        if self.size_decay != 1.0:
+            size *= self.size_decay
+        if self.size_shrink:
+            size -= self.size_shrink
+        self.lifetime[:] -= 1
+
+        alive = None
+        if self.expire:
+            alive = self.lifetime > 0
+        if self.min_size > 0:
+            big_enough = size >= self.min_size
+            alive = big_enough if alive is None else alive & big_enough
+        if alive is not None and not alive.all():
+            self.keep(alive)
+
+    def keep(self, mask):
+        """
+        Keep only the particles where mask is True, packing them to the
+        front of the arrays.
+
+        Args:
+            mask (numpy.ndarray): One bool per live particle
+        """
+        count = int(np.count_nonzero(mask))
+        for name, _, _ in self.FIELDS:
+            array = getattr(self, name)
+            array[:count] = array[:self.count][mask]
+        self.count = count
+
+    def clear(self):
+        """Remove every particle."""
+        self.count = 0
+
+    def get_alpha(self):
+        """
+        Get each particle's opacity, fading from 255 to 0 over its lifetime.
+
+        Returns:
+            numpy.ndarray: int alphas, one per particle
+        """
+        return (255 * self.lifetime / self.max_lifetime).astype(int)
+
+    def _on_screen(self, camera, margin=1):
+        """Mask of the particles whose box (grown by margin) is on screen."""
+        x, y, size = self.x, self.y, self.size
+        return ((x + size > camera.x - margin) & (x - size < camera.x + camera.width + margin) &
+                (y + size > camera.y - margin) & (y - size < camera.y + camera.height + margin))
+
+    def draw_circles(self, surface, camera=None):
+        """
+        Draw each particle as a solid circle in its colour.
+
+        Args:
+            surface (pygame.Surface): Surface to draw on
+            camera (Camera, optional): Camera to offset by and cull with.
+                Defaults to None (positions are screen positions).
+        """
+        if not self.count:
+            return
+        x, y = self.x, self.y
+        indices = np.arange(self.count)
+        if camera is not None:
+            indices = np.flatnonzero(self._on_screen(camera))
+            x = x - camera.x
+            y = y - camera.y
+        xs = x[indices].astype(int).tolist()
+        ys = y[indices].astype(int).tolist()
+        sizes = self.size[indices].astype(int).tolist()
+        colors = [tuple(color) for color in self.color_array[indices].tolist()]
+        for px, py, size, color in zip(xs, ys, sizes, colors):
+            pygame.draw.circle(surface, color, (px, py), size)
+
+    def draw_sprites(self, surface, get_sprite, alpha=None, camera=None):
+        """
+        Draw each particle as a pre-rendered sprite, in one blits() batch.
+
+        Args:
+            surface (pygame.Surface): Surface to draw on
+            get_sprite (callable): get_sprite(size, color, alpha) ->
+                (pygame.Surface, radius), e.g. a cached glow dot
+            alpha (numpy.ndarray, optional): Opacity per particle. Defaults to
+                get_alpha().
+            camera (Camera, optional): Camera to offset by and cull with.
+                Defaults to None (positions are screen positions).
+        """
+        if not self.count:
+            return
+        if alpha is None:
+            alpha = self.get_alpha()
+        x, y = self.x, self.y
+        visible = alpha > 0
+        if camera is not None:
+            visible &= self._on_screen(camera)
+            x = x - camera.x
+            y = y - camera.y
+        indices = np.flatnonzero(visible)
+
+        batch = []
+        colors = self.color_array[indices].tolist()
+        for px, py, size, color, opacity in zip(x[indices].tolist(), y[indices].tolist(),
+                                               self.size[indices].tolist(), colors,
+                                               alpha[indices].tolist()):
+            sprite, radius = get_sprite(size, tuple(color), opacity)
+            batch.append((sprite, (px - radius, py - radius)))
+        surface.blits(batch, doreturn=False)
+
+    def get_rects(self, offset_x=0, offset_y=0, margin=0):
+        """
+        Get the area each particle covers, e.g. to mark as dirty.
+
+        Args:
+            offset_x (float, optional): Subtracted from x (e.g. camera.x). Defaults to 0.
+            offset_y (float, optional): Subtracted from y. Defaults to 0.
+            margin (int, optional): Pixels to grow each area by. Defaults to 0.
+
+        Returns:
+            list: pygame.Rect per particle, rounded outwards
+        """
+        if not self.count:
+            return []
+        size = np.abs(self.size)
+        left = np.floor(self.x - offset_x - size).astype(int) - margin
+        top = np.floor(self.y - offset_y - size).astype(int) - margin
+        right = np.ceil(self.x - offset_x + size).astype(int) + margin
+        bottom = np.ceil(self.y - offset_y + size).astype(int) + margin
+        return [pygame.Rect(l, t, r - l, b - t) for l, t, r, b in
+                zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist())]
+
+    def get_bounds(self):
+        """
+        Get the box around every particle.
+
+        Returns:
+            tuple: (left, top, right, bottom), or None if the emitter is empty
+        """
+        if not self.count:
+            return None
+        size = np.abs(self.size)
+        return (math.floor((self.x - size).min()), math.floor((self.y - size).min()),
+                math.ceil((self.x + size).max()), math.ceil((self.y + size).max()))
@@ -1,74 +1,124 @@
 import pygame
-import random
 import math
 
+import numpy as np
+
 from camera import Camera
+from fx.particles import ParticleEmitter
+
+class FireflyParticleSystem:
+    """
+    A swarm of fireflies, drawn from pre-rendered glow sprites in one batch.
 
-class Value:
-    def __init__(self, x, y, width, height):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
+    The fireflies live in a ParticleEmitter that wanders and wraps around the
+    screen; blinking (fading out and back in on a random timer) is updated
+    for the whole swarm at once with arrays that line up with the emitter's.
+    """
+    SIZES = range(2, 6)  # Sizes a firefly can have
+    BRIGHTNESS_STEP = 8  # Brightness levels are rendered this far apart
+    COLOR = (200, 200, 200)
 
-class Firefly:
-    def __init__(self, WIDTH, HEIGHT, camera: Camera):
+    def __init__(self, WIDTH, HEIGHT, num_fireflies, camera: Camera):
         self.WIDTH = WIDTH
         self.HEIGHT = HEIGHT
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.size = random.randint(2, 5)
-        self.brightness = random.randint(100, 255)
-        self.speed = random.uniform(0.5, 1.0)
-        self.angle = random.uniform(0, 2 * math.pi)
-        self.visible = True
-        self.visibility_timer = random.randint(30, 300)
-        self.fade_speed = random.uniform(1, 5)
         self.camera = camera
-    
+        self.rng = np.random.default_rng()
+        rng = self.rng
 
-    def move(self):
-        # Add a small random angle change to simulate vibration
-        self.angle += random.uniform(-0.1, 0.1)
-        self.x += self.speed * math.cos(self.angle)
-        self.y += self.speed * math.sin(self.angle)
-        self.x %= self.WIDTH
-        self.y %= self.HEIGHT
+        # Fireflies vibrate by turning up to 0.1 radians a frame and never die
+        self.fireflies = ParticleEmitter(capacity=num_fireflies, color=self.COLOR, wander=0.1,
+                                         wrap=(WIDTH, HEIGHT), expire=False, rng=rng)
+        speed = rng.uniform(0.5, 1.0, num_fireflies)
+        angle = rng.uniform(0, 2 * math.pi, num_fireflies)
+        self.fireflies.emit_many(rng.integers(0, WIDTH, num_fireflies, endpoint=True),
+                                 rng.integers(0, HEIGHT, num_fireflies, endpoint=True),
+                                 speed * np.cos(angle), speed * np.sin(angle),
+                                 rng.integers(2, 5, num_fireflies, endpoint=True),
+                                 count=num_fireflies)
 
-        self.visibility_timer -= 1
-        if self.visibility_timer <= 0:
-            self.visible = not self.visible
-            self.visibility_timer = random.randint(30, 300)
-
-        if not self.visible:
-            self.brightness -= self.fade_speed
-            if self.brightness < 0:
-                self.brightness = 0
-        else:
-            self.brightness += self.fade_speed
-            if self.brightness > 255:
-                self.brightness = 255
+        # Blinking, one entry per firefly
+        self.brightness = rng.integers(100, 255, num_fireflies, endpoint=True).astype(float)
+        self.visible = np.ones(num_fireflies, dtype=bool)
+        self.visibility_timer = rng.integers(30, 300, num_fireflies, endpoint=True)
+        self.fade_speed = rng.uniform(1, 5, num_fireflies)
 
-    def draw(self, screen):
-        if self.brightness > 0:
-            color = (200, 200, 200, int(self.brightness))  # Yellow color with alpha for brightness
-            surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surface, color, (self.size, self.size), self.size)
-            value = Value(self.x, self.y, self.size * 2, self.size * 2)
-            location = self.camera.apply(value)
-            location.x = location.x % self.WIDTH
-            screen.blit(surface, (location[0] - self.size, location[1] - self.size))
+        # (size, brightness bucket) -> pygame.Surface, rendered up front
+        self.sprites = {}
+        for size in self.SIZES:
+            for brightness in range(0, 256 + self.BRIGHTNESS_STEP, self.BRIGHTNESS_STEP):
+                self.get_sprite(size, brightness)
 
+    def get_sprite(self, size, brightness):
+        """
+        Get the glow sprite for a firefly size and brightness.
 
-class FireflyParticleSystem: 
-    def __init__(self, WIDTH, HEIGHT, num_fireflies, camera: Camera):
-        self.fireflies = [Firefly(WIDTH, HEIGHT, camera) for _ in range(num_fireflies)]
+        Args:
+            size (int): Firefly radius in pixels
+            brightness (float): Alpha of the glow, 0-255, rounded to BRIGHTNESS_STEP
+
+        Returns:
+            pygame.Surface: A size*2 square sprite
+        """
+        bucket = min(255, round(brightness / self.BRIGHTNESS_STEP) * self.BRIGHTNESS_STEP)
+        key = (size, bucket)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*self.COLOR, bucket), (size, size), size)
+            self.sprites[key] = sprite
+        return sprite
 
     def update(self):
-        for firefly in self.fireflies:
-            firefly.move()
+        self.fireflies.update()
 
-    def draw(self, screen):
+        # Toggle between fading out and fading in when the timer runs out
+        self.visibility_timer -= 1
+        toggled = self.visibility_timer <= 0
+        count = int(np.count_nonzero(toggled))
+        if count:
+            self.visible[toggled] = ~self.visible[toggled]
+            self.visibility_timer[toggled] = self.rng.integers(30, 300, count, endpoint=True)
+
+        self.brightness += np.where(self.visible, self.fade_speed, -self.fade_speed)
+        np.clip(self.brightness, 0, 255, out=self.brightness)
+
+    def get_positions(self):
+        """
+        Get the screen position of the top-left of each firefly's glow.
+
+        Returns:
+            tuple: (x, y) int arrays
+        """
+        size = self.fireflies.size.astype(int)
+        # Fireflies wrap around horizontally as the camera scrolls
+        x = np.trunc(self.fireflies.x - self.camera.x).astype(int) % self.WIDTH
+        y = np.trunc(self.fireflies.y - self.camera.y).astype(int)
+        return x - size, y - size
 
-        for firefly in self.fireflies:
-            firefly.draw(screen)
+    def get_draw_rects(self):
+        """Get the screen area each firefly is drawn in."""
+        x, y = self.get_positions()
+        sizes = self.fireflies.size.astype(int) * 2
+        return [pygame.Rect(left, top, size, size)
+                for left, top, size in zip(x.tolist(), y.tolist(), sizes.tolist())]
+
+    def emit_light(self, lightmap):
+        """Add a faint glow around each lit firefly to a Lightmap."""
+        x, y = self.get_positions()
+        sizes = self.fireflies.size.astype(int)
+        lit = np.flatnonzero(self.brightness > 0)
+        for left, top, size, brightness in zip(x[lit].tolist(), y[lit].tolist(),
+                                               sizes[lit].tolist(), self.brightness[lit].tolist()):
+            # Fireflies drift in screen space, so they don't cast shadows
+            lightmap.add_light(left + size, top + size, size * 8, brightness * 0.4, shadows=False)
+
+    def draw(self, screen):
+        """Draw every lit, on-screen firefly with a single blits() call."""
+        x, y = self.get_positions()
+        sizes = self.fireflies.size.astype(int)
+        shown = np.flatnonzero((self.brightness > 0) & (y > -sizes * 2) & (y < self.HEIGHT))
+        batch = [(self.get_sprite(size, brightness), (left, top))
+                 for left, top, size, brightness in zip(x[shown].tolist(), y[shown].tolist(),
+                                                        sizes[shown].tolist(),
+                                                        self.brightness[shown].tolist())]
+        screen.blits(batch, doreturn=False)
@@ -2,57 +2,76 @@ import pygame
 from utils.utils import load_image
 import random
 
-class Fog:
+import numpy as np
+
+class FogManager:
     """
     Continuously generate slow moving fog that moves across the screen
+
+    The fog is made of around 20 overlapping fog sprites drifting right at the
+    same speed. As they never move relative to each other, they are
+    composited once into a strip that wraps around horizontally, and drawing
+    the fog is one or two blits of that strip at the current scroll offset.
+    The strip is layered in floating point with premultiplied alpha, so it
+    looks the same as blending each sprite over the screen in turn.
     """
-    def __init__(self, screen_width, screen_height, x=0, y=0):
-        # Load fog image
-        self.image = load_image('images/fog/fog.png', use_alpha=True)
-        self.image.set_alpha(40)
-
-         # Fallback if loading failed
-        if self.image is None:
-            self.image = pygame.Surface((32, 32))
-            self.image.fill((255, 255, 255))  # White color
-        
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.x_float = self.rect.x
+    def __init__(self, screen_width, screen_height, num_fog_sprites, speed=0.2, alpha=40):
+        """
+        Composite the fog strip.
+
+        Args:
+            screen_width (int): Screen width in pixels
+            screen_height (int): Screen height in pixels
+            num_fog_sprites (int): Fog sprites layered into the strip
+            speed (float, optional): Pixels the fog drifts per frame. Defaults to 0.2.
+            alpha (int, optional): Opacity of each fog sprite. Defaults to 40.
+        """
+        # Load fog image (shared with the texture cache, so it is only read
+        # from, into arrays of its own)
+        image = load_image('images/fog/fog.png', use_alpha=True)
+
+        # Fallback if loading failed
+        if image is None:
+            image = pygame.Surface((32, 32), pygame.SRCALPHA)
+            image.fill((255, 255, 255))  # White color
+
+        # Sprites used to drift in from 200 pixels left of the screen until
+        # they left it on the right, so the strip repeats over that distance
+        self.period = max(screen_width + 200, image.get_width())
         self.screen_width = screen_width
-        # Set initial speed
-        self.speed = 0.2
-    
-    def update(self):
-        self.x_float = self.x_float + self.speed
-        self.rect.x = int(self.x_float)
-        if(self.rect.x > self.screen_width):
-            self.rect.x = 0
-            self.x_float = -200
+        self.speed = speed
+        self.x_float = 0.0
+        self.offset = 0  # Whole pixels the fog has drifted, wrapped to the period
 
-    def draw(self, screen):
-        # Draw the fog image
-        screen.blit(self.image, self.rect, special_flags=pygame.BLEND_ALPHA_SDL2)
-        # Set the alpha value for the fog image
+        # Premultiplied sprite colour and opacity, 0-1, indexed [x, y]
+        sprite_alpha = pygame.surfarray.array_alpha(image) * (alpha / 255 / 255)
+        sprite_color = pygame.surfarray.array3d(image) / 255 * sprite_alpha[..., None]
 
-class FogManager:
-    """
-    manage all of the fog sprites
-    there will be around 20 fog sprites
-    """
-    def __init__(self, screen_width, screen_height, num_fog_sprites):
-        self.fog_sprites = []
+        # Layer the sprites: each one goes over what is already there
+        strip_alpha = np.zeros((self.period, image.get_height()))
+        strip_color = np.zeros((self.period, image.get_height(), 3))
         for i in range(num_fog_sprites):
             x = random.randint(0, screen_width - 1)
-            y = 0 
-            fog = Fog(screen_width, screen_height, x, y)
-            self.fog_sprites.append(fog)
-    
+            # Whatever hangs off the end of the strip wraps around to the start
+            columns = np.arange(x, x + image.get_width()) % self.period
+            strip_color[columns] = sprite_color + strip_color[columns] * (1 - sprite_alpha[..., None])
+            strip_alpha[columns] = sprite_alpha + strip_alpha[columns] * (1 - sprite_alpha)
+
+        self.strip = pygame.Surface((self.period, image.get_height()), pygame.SRCALPHA)
+        pygame.surfarray.blit_array(self.strip, np.rint(strip_color * 255).astype(np.uint8))
+        pygame.surfarray.pixels_alpha(self.strip)[...] = np.rint(strip_alpha * 255).astype(np.uint8)
+
+    def get_rect(self):
+        """Get the screen area the fog is drawn over."""
+        return pygame.Rect(0, 0, self.screen_width, self.strip.get_height())
+
     def draw(self, screen):
-        for fog in self.fog_sprites:
-            fog.draw(screen)
-    
+        x = self.offset
+        # The copy to the left covers the screen up to where this one starts
+        screen.blit(self.strip, (x - self.period, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
+        if x < self.screen_width:
+            screen.blit(self.strip, (x, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
+
     def update(self):
-        i = 0
-        for fog in self.fog_sprites:
-            i = i + 1
-            fog.update()
\ No newline at end of file
+        self.x_float = (self.x_float + self.speed) % self.period
+        self.offset = int(self.x_float)
@@ -1,10 +1,31 @@
 import pygame
 from utils.utils import load_image, get_file_path, FILETYPE
 
+# HUD font, created on first use (loading a font reads it from disk)
+_font = None
+
+def get_font():
+    """Get the shared HUD font."""
+    global _font
+    if _font is None:
+        _font = pygame.font.Font(None, 24)
+    return _font
+
 class HealthBar:
+    """
+    Health bar HUD: a bar with a face per health point and a health text.
+
+    Everything is composited into one cached surface, which is only rebuilt
+    when health or max_health change, so drawing the HUD is a single blit.
+    """
     def __init__(self, max_health):
         self.max_health = max_health
         self.health = max_health
+        self.position = (10, 10)
+
+        # Composited HUD and the (health, max_health) it shows
+        self.hud = None
+        self.hud_state = None
 
         # Load health bar images with proper path handling
         # Fix paths to use forward slashes and get_file_path for cross-platform compatibility
@@ -62,10 +83,26 @@ class HealthBar:
         """Reduces health by the specified amount (default 1) and prevents negative health."""
         self.health = max(self.health - amount, 0)
 
+    def get_hud(self):
+        """Get the composited HUD, rebuilding it if health changed."""
+        state = (self.health, self.max_health)
+        if self.hud is None or self.hud_state != state:
+            self.hud = self._build_hud()
+            self.hud_state = state
+        return self.hud
+
+    def get_rect(self):
+        """Get the screen area the health bar and its text are drawn in."""
+        return self.get_hud().get_rect(topleft=self.position)
+
     def draw(self, surface):
-        """Draw the health bar using images."""
-        bar_x = 10
-        bar_y = 10
+        """Draw the health bar (a single blit of the cached HUD)."""
+        surface.blit(self.get_hud(), self.position)
+
+    def _build_hud(self):
+        """Composite the bar, faces and text onto a new surface."""
+        bar_x = 0
+        bar_y = 0
         bar_width = self.health_bar_image.get_width()
         bar_height = self.health_bar_image.get_height()
         face_width_small = self.health_face_image_small.get_width()
@@ -73,12 +110,21 @@ class HealthBar:
         face_width_large = self.health_face_image_large.get_width()
         face_height_large = self.health_face_image_large.get_height()
 
-        # Draw the health bar background
-        surface.blit(self.health_bar_image, (bar_x, bar_y))
+        # Render the health text first, the HUD has to fit it
+        health_text = get_font().render(f'Health: {self.health}/{self.max_health}', True, (255, 255, 255))
+        text_rect = health_text.get_rect(topleft=(bar_x, bar_y + bar_height + 5))
 
         # Calculate the number of faces to draw based on current health
         # Each face represents one health unit.
         num_faces = self.health  # Assuming health is an integer (e.g., max_health = 5)
+        faces_right = bar_x + 20 + face_width_large + 25 + (face_width_small + 5) * max(num_faces - 1, 0)
+
+        surface = pygame.Surface((max(bar_width, faces_right, text_rect.right), text_rect.bottom),
+                                 pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+
+        # Draw the health bar background
+        surface.blit(self.health_bar_image, (bar_x, bar_y))
 
         # Draw the first face larger if at least one health unit remains
         if num_faces > 0:
@@ -90,7 +136,5 @@ class HealthBar:
             surface.blit(self.health_face_image_small, (face_x, bar_y + (bar_height - face_height_small) // 2))
 
         # Draw the health text below the health bar
-        font = pygame.font.Font(None, 24)
-        health_text = font.render(f'Health: {self.health}/{self.max_health}', True, (255, 255, 255))
-        text_rect = health_text.get_rect(topleft=(bar_x, bar_y + bar_height + 5))
         surface.blit(health_text, text_rect)
+        return surface
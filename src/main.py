@@ -7,10 +7,17 @@ import pygame.gfxdraw  # Add import for anti-aliased graphics
 from entities.player import Player
 from fx.particlesystems.fog import FogManager
 from utils.controls import Controls
-from entities.background import Background, draw_overlay
-from entities.tile import Tile
+from entities.background import Background, LIGHT_RADIUS
+from fx.lightmap import Lightmap
+from utils.tilegrid import DEATH
+from utils.chunkrenderer import ChunkRenderer
+from utils.dirtyrects import DirtyRects
+from utils.occluders import Occluders
+from utils.animationplayer import get_baked_frame_stats
+from utils.atlas import load_sprite_atlas
 # ======================= IMPROVED MAP GENERATION IMPORT =======================
-from utils.utils import parse_map, get_file_path, FILETYPE
+from utils.utils import get_file_path, FILETYPE
+from utils.levelfile import Level, load_level_file, LEVEL_FILE
 # ===============================================================================
 from utils.audioplayer import play_background_music
 from fx.particlesystems.fireflies import FireflyParticleSystem
@@ -71,9 +78,24 @@ LEVEL_MAP = [
 ]
 # ===============================================================================
 
-# Calculate level dimensions based on the map
-LEVEL_WIDTH = len(LEVEL_MAP[0]) * TILE_SIZE
-LEVEL_HEIGHT = len(LEVEL_MAP) * TILE_SIZE
+# The compiled binary level (LEVEL_FILE, levels/level1.mkl) is loaded instead
+# of parsing LEVEL_MAP when it exists. Build it from a text map with
+# python src/utils/levelfile.py map.txt levels/level1.mkl, or with Ctrl+B in
+# the map editor.
+
+def feet_in_death_zone(level_grid, rect):
+    """
+    Check if an entity's feet touch a death zone.
+    Only the center 50% of the width and the bottom 20% of the height count,
+    which is more lenient and makes more sense for platformers.
+    """
+    return level_grid.collides_box(
+        rect.x + rect.width * 0.25,
+        rect.y + rect.height * 0.8,
+        rect.width * 0.5,
+        rect.height * 0.2,
+        DEATH
+    )
 
 # --------------------------------------------------------------------------------
 # MAIN GAME LOOP
@@ -89,8 +111,27 @@ def main():
     pygame.display.set_caption("MAGE-KNIGHT")
     clock = pygame.time.Clock()
 
+    # Sprites are served from the packed texture atlas (built with
+    # 'python -m utils.atlas'), so load it before anything loads a sprite
+    load_sprite_atlas()
+
+    # ======================= LEVEL LOADING =======================
+    # Load the compiled level if there is one, otherwise parse the text map.
+    # The level is kept as a compact TileGrid (no Tile object per cell), with
+    # death zones merged into one span per horizontal run of 'X' and solids
+    # merged into larger collision rectangles
+    if os.path.exists(LEVEL_FILE):
+        level = load_level_file(LEVEL_FILE)
+    else:
+        level = Level.from_map(LEVEL_MAP, TILE_SIZE)
+    level_grid = level.grid
+    player_spawn = level.player_spawn
+    enemy_spawns = level.enemy_spawns
+    flying_enemy_spawns = level.flying_enemy_spawns
+    # ===============================================================================
+
     # Initialize camera
-    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, LEVEL_WIDTH, LEVEL_HEIGHT)
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, level_grid.pixel_width, level_grid.pixel_height)
 
     # Initialize controls system
     controls = Controls()
@@ -99,10 +140,22 @@ def main():
     fog_manager = FogManager(SCREEN_WIDTH, SCREEN_HEIGHT, 20)
     # Create background
     background = Background(SCREEN_WIDTH, SCREEN_HEIGHT)
+    # Darkness lit by the player and anything glowing, at quarter resolution,
+    # with the solid tiles casting shadows
+    occluders = Occluders(level_grid)
+    level.listeners.append(occluders.invalidate)
+    lightmap = Lightmap(SCREEN_WIDTH, SCREEN_HEIGHT, occluders=occluders)
 
     # ======================= IMPROVED MAP LOADING WITH FLYING ENEMIES =======================
-    # Parse level map to get tiles, spawn positions, and death zones
-    tiles, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones = parse_map(LEVEL_MAP, TILE_SIZE, Tile)
+    # Collide against the merged solid rectangles, which the level keeps
+    # bucketed in a grid index so collision only checks nearby cells
+    tile_index = level.colliders
+    # Bake the static tiles into chunk surfaces once, up front, so drawing
+    # only touches visible chunks and never bakes during gameplay
+    level_renderer = ChunkRenderer(level_grid, level.tile_size)
+    level_renderer.prewarm()
+    # Re-bake only the affected chunk whenever a cell of the level is edited
+    level.listeners.append(level_renderer.invalidate)
     # ===============================================================================
     
     # ======================= FIXED ENEMY CREATION AND POSITIONING =======================
@@ -117,7 +170,8 @@ def main():
     for i, spawn in enumerate(enemy_spawns):
         patrol = patrol_distances[i % len(patrol_distances)]  # Cycle through patrol distances
         # Position the enemy on top of the platform by offsetting y position
-        enemies.append(Enemy(spawn[0], spawn[1] + enemy_y_offset, patrol_distance=patrol))
+        enemies.append(Enemy(spawn[0], spawn[1] + enemy_y_offset, patrol_distance=patrol,
+                             platforms=level.platforms))
         print(f"Created enemy at ({spawn[0]}, {spawn[1] + enemy_y_offset})")
     # ===============================================================================
     
@@ -171,6 +225,11 @@ def main():
     hit_effects = []
     # ===============================================================================
 
+    # Only the parts of the screen that changed are pushed to the display
+    dirty = DirtyRects(SCREEN_WIDTH, SCREEN_HEIGHT)
+    last_view_state = None
+    last_fog_offset = None
+
     running = True
     while running:
         # 1. Process events
@@ -185,30 +244,19 @@ def main():
         controls.update()
         
         # 2. Update game objects
-        player.update(tiles)
+        player.update(tile_index)
         # Update camera to follow player
         camera.update(player)
         
         # ======================= IMPROVED DEATH ZONE COLLISION DETECTION =======================
-        # Check if player is in a death zone
-        player_rect = player.rect
+        # Death zones are looked up in the level grid, so each check only visits
+        # the cells under an entity's feet and allocates no Rects
         player_died = False
         
-        for death_zone in death_zones:
-            # Check if player's feet touch the death zone
-            # This is more lenient and makes more sense for platformers
-            feet_rect = pygame.Rect(
-                player_rect.x + player_rect.width * 0.25,
-                player_rect.y + player_rect.height * 0.8,
-                player_rect.width * 0.5,  # Only check the center 50% of the player width
-                player_rect.height * 0.2   # Only check the bottom 20% of the player height
-            )
-            
-            if feet_rect.colliderect(death_zone):
-                player.health = 0
-                player_died = True
-                print("Player hit a death zone!")
-                break  # Exit loop once death is detected
+        if feet_in_death_zone(level_grid, player.rect):
+            player.health = 0
+            player_died = True
+            print("Player hit a death zone!")
                 
         # Check if enemies are in death zones and remove them if they are
         for enemy in enemies[:]:  # Create a copy of the list for safe removal
@@ -218,34 +266,15 @@ def main():
                 print("Enemy is dead")
                 continue
             
-            for death_zone in death_zones:
-                # Create a feet rect for the enemy similar to the player
-                enemy_feet_rect = pygame.Rect(
-                    enemy.rect.x + enemy.rect.width * 0.25,
-                    enemy.rect.y + enemy.rect.height * 0.8,
-                    enemy.rect.width * 0.5,
-                    enemy.rect.height * 0.2
-                )
-                
-                if enemy_feet_rect.colliderect(death_zone):
-                    enemies.remove(enemy)
-                    print(f"Enemy fell into death zone at ({enemy.rect.x}, {enemy.rect.y})")
-                    break  # Exit inner loop once this enemy is removed
+            if feet_in_death_zone(level_grid, enemy.rect):
+                enemies.remove(enemy)
+                print(f"Enemy fell into death zone at ({enemy.rect.x}, {enemy.rect.y})")
                     
         # Check for flying enemies in death zones as well
         for enemy in flying_enemies[:]:
-            for death_zone in death_zones:
-                enemy_feet_rect = pygame.Rect(
-                    enemy.rect.x + enemy.rect.width * 0.25,
-                    enemy.rect.y + enemy.rect.height * 0.8,
-                    enemy.rect.width * 0.5,
-                    enemy.rect.height * 0.2
-                )
-                
-                if enemy_feet_rect.colliderect(death_zone):
-                    flying_enemies.remove(enemy)
-                    print(f"Flying enemy hit death zone at ({enemy.rect.x}, {enemy.rect.y})")
-                    break
+            if feet_in_death_zone(level_grid, enemy.rect):
+                flying_enemies.remove(enemy)
+                print(f"Flying enemy hit death zone at ({enemy.rect.x}, {enemy.rect.y})")
         # ===============================================================================
         
         # Reset player and enemies if player died
@@ -268,7 +297,8 @@ def main():
                 enemies.append(Enemy(
                     spawn_info['x'],
                     spawn_info['y'],
-                    patrol_distance=spawn_info['patrol']
+                    patrol_distance=spawn_info['patrol'],
+                    platforms=level.platforms
                 ))
                 
             # Respawn flying enemies too
@@ -290,7 +320,7 @@ def main():
         # Update all enemies and pass the player parameter for detection
         for enemy in enemies[:]:  # Use copy to allow safe removal
             # Update returns False if enemy should be removed (fell out of bounds)
-            if not enemy.update(tiles, player):
+            if not enemy.update(tile_index, player):
                 enemies.remove(enemy)
                 
             # Check for player-enemy collision only if player is not invulnerable
@@ -338,10 +368,12 @@ def main():
         # ===============================================================================
                 
         # ======================= FLYING ENEMY PROCESSING - IMPROVED =======================
-        # Update all flying enemies and pass the player parameter for detection
+        # Update all flying enemies and pass the player parameter for detection.
+        # Flying enemies push out of the first solid they touch on both axes, which
+        # only behaves with tile-sized solids, so they collide with level_grid cells.
         for enemy in flying_enemies[:]:  # Use copy to allow safe removal
             # Update returns False if enemy should be removed
-            if not enemy.update(tiles, player):
+            if not enemy.update(level_grid, player):
                 flying_enemies.remove(enemy)
                 
             # Check for player-enemy collision only if player is not invulnerable
@@ -396,11 +428,8 @@ def main():
         # Draw background
         background.draw(screen, player_rect=player.rect)
 
-        # Draw the level tiles with camera offset
-        for tile in tiles:
-            # Apply camera offset to each tile
-            tile_rect = camera.apply(tile)
-            screen.blit(tile.image, tile_rect)
+        # Draw the level tiles with camera offset (only chunks on screen)
+        level_renderer.draw(screen, camera)
 
         # ======================= ENEMY IMPLEMENTATION - DRAW ALL ENEMIES =======================
         # Draw all enemies with camera offset
@@ -414,7 +443,12 @@ def main():
             
         fog_manager.draw(screen)
         player_render_rect = camera.apply(player)
-        draw_overlay(SCREEN_WIDTH, SCREEN_HEIGHT, screen, player_rect=player_render_rect)
+        # Light the darkness: the player, slime projectiles, charge glows and fireflies
+        lightmap.add_light(player_render_rect.centerx, player_render_rect.centery, LIGHT_RADIUS)
+        for enemy in flying_enemies:
+            enemy.emit_light(lightmap, camera)
+        firefly_particle_system.emit_light(lightmap)
+        lightmap.render(screen, camera)
         
         # ======================= KNOCKBACK IMPLEMENTATION - VISUAL INDICATOR =======================
         # Optional: Flash the player sprite when invulnerable
@@ -428,13 +462,12 @@ def main():
             player.draw(screen)
         # ===============================================================================
         
-        # Draw any footstep particles with camera offset
-        for particle in player.footstep_particles:
-            particle.update()
-            # Draw at camera-adjusted position
-            adjusted_x = particle.x - camera.x
-            adjusted_y = particle.y - camera.y
-            pygame.draw.circle(screen, particle.color, (int(adjusted_x), int(adjusted_y)), int(particle.size))
+        # Draw any footstep particles with camera offset. Player.draw already
+        # updated and drew them without the offset, so remember where they
+        # were drawn before this second update moves or removes them
+        footstep_rects = player.footstep_particles.get_rects(margin=2)
+        player.footstep_particles.update()
+        player.footstep_particles.draw_circles(screen, camera)
         
         # ======================= HIT EFFECT IMPLEMENTATION - DRAW EFFECTS =======================
         # Draw all active hit effects
@@ -446,20 +479,66 @@ def main():
 
         # ======================= FIXED DEATH ZONE VISUALIZATION (DEBUG ONLY) =======================
         # Uncomment to visualize death zones during debugging
-        # for death_zone in death_zones:
+        # for death_cell in level_grid.query(camera.viewport, DEATH):
         #     # Apply camera offset
-        #     adjusted_rect = pygame.Rect(
-        #         death_zone.x - camera.x, 
-        #         death_zone.y - camera.y,
-        #         death_zone.width, 
-        #         death_zone.height
-        #     )
+        #     adjusted_rect = camera.apply(death_cell)
         #     pygame.draw.rect(screen, (255, 0, 0), adjusted_rect, 1)
         # ===============================================================================
         
-        pygame.display.flip()
+        # ======================= DIRTY RECT DISPLAY UPDATE =======================
+        # The whole frame is drawn above, but only changed regions are pushed.
+        # The level and background cover the whole screen, so if the camera
+        # or a parallax layer moved the entire frame goes out.
+        view_state = (camera.x, camera.y, background.get_offsets(player.rect.centerx))
+        if view_state != last_view_state:
+            dirty.mark_all()
+            last_view_state = view_state
+        # The fog moves a whole pixel every few frames; only its band changes.
+        # With the current fog sprite the band is the whole screen, so those
+        # frames still go out in full
+        if fog_manager.offset != last_fog_offset:
+            dirty.mark_in_place(fog_manager.get_rect())
+            last_fog_offset = fog_manager.offset
+        
+        # Otherwise mark everything that moves or animates on its own
+        for enemy in enemies + flying_enemies:
+            if not enemy.is_dead:
+                dirty.mark(camera.apply(enemy), margin=16)
+        for enemy in flying_enemies:
+            for projectile in enemy.projectiles:
+                dirty.mark(camera.apply(projectile.get_draw_rect()))
+            if not enemy.is_dead:
+                for rect in enemy.get_trail_rects(camera):
+                    dirty.mark(rect)
+        player_screen_rect = camera.apply(player)
+        dirty.mark(player_screen_rect.union((player_screen_rect.topleft, player.image.get_size())))
+        dirty.mark(camera.apply(player.sword))
+        if player.sword.hit_effect is not None:
+            # The sword's hit effect is drawn without the camera offset
+            dirty.mark(player.sword.hit_effect.get_draw_rect())
+        # Footstep particles are drawn both with and without the camera offset
+        for rect in footstep_rects:
+            dirty.mark(rect)
+        for rect in player.footstep_particles.get_rects(camera.x, camera.y, margin=2):
+            dirty.mark(rect)
+        for effect in hit_effects:
+            dirty.mark(camera.apply(effect.get_draw_rect()))
+        for rect in firefly_particle_system.get_draw_rects():
+            dirty.mark(rect)
+        dirty.mark(player.health_bar.get_rect())
+        for light_rect in lightmap.changed_rects:
+            dirty.mark(light_rect)
+        
+        dirty.present()
+        # ===============================================================================
         clock.tick(60)
     
+    stats = dirty.get_stats()
+    print(f"Display updates: {stats['full_frames']}/{stats['frames']} full frames, "
+          f"{stats['average_coverage']:.0%} of the screen pushed on average")
+    stats = get_baked_frame_stats()
+    print(f"Baked frames: {stats['entries']} cached, {stats['misses']} baked, "
+          f"{stats['hits']} reused, {stats['evictions']} evicted")
     pygame.quit()
     sys.exit()
 
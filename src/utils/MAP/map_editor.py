@@ -10,6 +10,9 @@ import os
 # Allow running directly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+from utils.levelfile import Level, save_level, LEVEL_FILE
+from utils.dirtyrects import DirtyRects
+
 class MapEditor:
     def __init__(self, map_data=None, tile_size=32):
         """
@@ -48,6 +51,10 @@ class MapEditor:
         self.map_width = len(self.map_data[0])
         self.map_height = len(self.map_data)
         
+        # Parsed level kept in sync with every edit, so it can be compiled
+        # at any time without reparsing the map
+        self.level = Level.from_map(self.map_data, self.tile_size)
+        
         # ======================= IMPROVED SCREEN SETUP =======================
         # Set up display with reasonable window size
         self.screen_width = min(self.map_width * self.tile_size, 800)
@@ -58,6 +65,10 @@ class MapEditor:
         # Calculate visible dimensions
         self.visible_width = self.screen_width // self.tile_size
         self.visible_height = self.screen_height // self.tile_size
+        
+        # Only the parts of the window that changed are pushed to the display
+        self.dirty = DirtyRects(self.screen_width, self.screen_height)
+        self.watch_level()
         # ===============================================================================
         
         # Tile types and their colors
@@ -93,6 +104,16 @@ class MapEditor:
         self.can_expand_map = True  # Allow map expansion
         # ===============================================================================
     
+    def watch_level(self):
+        """Redraw the whole window for a new level, then only the cells that get edited."""
+        self.level.listeners.append(self.mark_cell)
+        self.dirty.mark_all()
+    
+    def mark_cell(self, cell_rect):
+        """Mark an edited cell (a rect in level pixels) as changed on screen."""
+        self.dirty.mark(cell_rect.move(-self.camera_x * self.tile_size,
+                                       -self.camera_y * self.tile_size))
+    
     def save_map(self, filename="map.txt"):
         """Save the current map to a file"""
         with open(filename, 'w') as f:
@@ -107,6 +128,8 @@ class MapEditor:
                 self.map_data = [line.strip() for line in f.readlines()]
             self.map_width = len(self.map_data[0])
             self.map_height = len(self.map_data)
+            self.level = Level.from_map(self.map_data, self.tile_size)
+            self.watch_level()
             
             # Recalculate visible dimensions
             self.visible_width = self.screen_width // self.tile_size
@@ -116,6 +139,14 @@ class MapEditor:
         except Exception as e:
             print(f"Error loading map: {e}")
     
+    def compile_map(self, filename=LEVEL_FILE):
+        """
+        Save the current map as a compiled binary level (see utils/levelfile.py).
+        Defaults to the level file the game loads.
+        """
+        save_level(self.level, filename)
+        print(f"Compiled map saved to {filename}")
+    
     # ======================= EXPANDING MAP FUNCTIONS =======================
     def expand_map(self, direction):
         """
@@ -151,6 +182,9 @@ class MapEditor:
         # Update map dimensions
         self.map_width = len(self.map_data[0])
         self.map_height = len(self.map_data)
+        # The grid changed size, so this is the one edit that needs a reparse
+        self.level = Level.from_map(self.map_data, self.tile_size)
+        self.watch_level()
         print(f"Map expanded {direction}. New size: {self.map_width}x{self.map_height}")
     # ===============================================================================
     
@@ -234,6 +268,7 @@ class MapEditor:
         """Main loop for the map editor"""
         running = True
         clock = pygame.time.Clock()
+        last_view = None
         
         # Show instructions at start
         print("Map Editor Instructions:")
@@ -245,6 +280,7 @@ class MapEditor:
         print("- P: Print map data for copy/paste")
         print("- S: Save map")
         print("- L: Load map")
+        print("- B: Save compiled level")
         
         while running:
             for event in pygame.event.get():
@@ -316,6 +352,8 @@ class MapEditor:
                         self.save_map()
                     elif event.key == pygame.K_l and pygame.key.get_mods() & pygame.KMOD_CTRL:
                         self.load_map()
+                    elif event.key == pygame.K_b and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        self.compile_map()
                     
                     # Print map for copy/paste
                     elif event.key == pygame.K_p and pygame.key.get_mods() & pygame.KMOD_CTRL:
@@ -354,19 +392,33 @@ class MapEditor:
                                 # Replace S with empty space
                                 index = row.index('S')
                                 self.map_data[y] = row[:index] + '.' + row[index+1:]
+                                self.level.set_cell(index, y, '.')
                     
                     # Update the map
                     row = self.map_data[tile_y]
                     self.map_data[tile_y] = row[:tile_x] + self.current_tile + row[tile_x+1:]
+                    # Incrementally update the parsed level for just this cell
+                    self.level.set_cell(tile_x, tile_y, self.current_tile)
             # ===============================================================================
                     
             # Update continuous scrolling
             self.update_scroll()
             
             self.draw()
-            pygame.display.flip()
+            
+            # Scrolling moves every tile; otherwise only edited cells (marked
+            # by mark_cell) and the info text at the bottom change
+            view = (self.camera_x, self.camera_y)
+            if view != last_view:
+                self.dirty.mark_all()
+                last_view = view
+            self.dirty.mark(pygame.Rect(0, self.screen_height - 48, self.screen_width, 48))
+            self.dirty.present()
             clock.tick(60)
         
+        stats = self.dirty.get_stats()
+        print(f"Display updates: {stats['full_frames']}/{stats['frames']} full frames, "
+              f"{stats['average_coverage']:.0%} of the window pushed on average")
         pygame.quit()
 
 if __name__ == "__main__":
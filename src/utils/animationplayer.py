@@ -7,13 +7,84 @@ supporting variable frame counts, sizes, and timing information from JSON files.
 import pygame
 import json
 import os
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
 from .utils import load_image
 
+# ======================= BAKED FRAME CACHE =======================
+# Scaled and flipped frames, shared by every AnimationPlayer in the process and
+# keyed by (sheet, frame index, scale x, scale y, flip_x, flip_y). Frames are
+# baked when an animation is loaded or rescaled, for both facings, so draw()
+# only looks them up. The least recently used frames are dropped past the limit.
+MAX_BAKED_FRAMES = 1024
+_baked_frames = OrderedDict()
+_baked_frame_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def get_baked_frame(animation, index, scale_factor=(1.0, 1.0), flip_x=False, flip_y=False):
+    """
+    Get an animation frame scaled and flipped, transforming it only if it
+    isn't cached yet.
+
+    Args:
+        animation (Animation): Animation the frame belongs to
+        index (int): Frame index in the animation
+        scale_factor (tuple, optional): (width_factor, height_factor). Defaults to (1.0, 1.0).
+        flip_x (bool, optional): Flip horizontally. Defaults to False.
+        flip_y (bool, optional): Flip vertically. Defaults to False.
+
+    Returns:
+        pygame.Surface: The baked frame. Treat it as read-only.
+    """
+    key = (animation.sheet, index, scale_factor[0], scale_factor[1], flip_x, flip_y)
+    baked = _baked_frames.get(key)
+    if baked is not None:
+        _baked_frame_stats["hits"] += 1
+        _baked_frames.move_to_end(key)
+        return baked
+    _baked_frame_stats["misses"] += 1
+
+    # Process the frame
+    baked = animation.frames[index]
+
+    # Apply scaling if needed
+    if scale_factor != (1.0, 1.0):
+        width = int(baked.get_width() * scale_factor[0])
+        height = int(baked.get_height() * scale_factor[1])
+        baked = pygame.transform.scale(baked, (width, height))
+
+    # Apply flipping if needed - using explicit flags for clarity
+    if flip_x or flip_y:
+        baked = pygame.transform.flip(baked, flip_x, flip_y)
+
+    _baked_frames[key] = baked
+    if len(_baked_frames) > MAX_BAKED_FRAMES:
+        _baked_frames.popitem(last=False)
+        _baked_frame_stats["evictions"] += 1
+    return baked
+
+def get_baked_frame_stats():
+    """
+    Get baked frame cache counters.
+
+    Returns:
+        dict: {"hits": int, "misses": int, "evictions": int, "entries": int}
+    """
+    return dict(_baked_frame_stats, entries=len(_baked_frames))
+
+def clear_baked_frames():
+    """Drop every baked frame and reset the counters."""
+    _baked_frames.clear()
+    for key in _baked_frame_stats:
+        _baked_frame_stats[key] = 0
+# ===============================================================================
+
 class Animation:
     """
     Represents a single animation with multiple frames and timing information.
     """
-    def __init__(self, name, frames, durations=None, loop=True):
+    def __init__(self, name, frames, durations=None, loop=True, sheet=None):
         """
         Initialize an animation
 
@@ -22,8 +93,12 @@ class Animation:
             frames (list): List of pygame surfaces representing animation frames
             durations (list, optional): List of frame durations in milliseconds. Defaults to None.
             loop (bool, optional): Whether the animation should loop. Defaults to True.
+            sheet (str, optional): Sprite sheet the frames were cut from, which
+                identifies them in the baked frame cache. Defaults to None
+                (the animation itself identifies its frames).
         """
         self.name = name
+        self.sheet = sheet if sheet is not None else self
         self.frames = frames
         self.frame_count = len(frames)
         
@@ -40,7 +115,13 @@ class Animation:
                 self.durations = self.durations[:self.frame_count]
                 
         self.loop = loop
-        self.total_duration = sum(self.durations)
+        # End time of each frame, for looking frames up with a binary search
+        self.timeline = list(accumulate(self.durations))
+        self.total_duration = self.timeline[-1] if self.timeline else 0
+
+        # Frame resolved for the shared clock, see get_frame_index_at_clock
+        self.clock_time = None
+        self.clock_frame = None
         
     def get_frame_at_time(self, elapsed_time):
         """
@@ -52,69 +133,101 @@ class Animation:
         Returns:
             tuple: (frame surface, is_animation_complete)
         """
+        index, is_complete = self.get_frame_index_at_time(elapsed_time)
+        return self.frames[index], is_complete
+
+    def get_frame_index_at_time(self, elapsed_time):
+        """
+        Get the index of the frame to display at a given elapsed time.
+        
+        Args:
+            elapsed_time (float): Elapsed time in milliseconds
+            
+        Returns:
+            tuple: (frame index, is_animation_complete)
+        """
         # Handle completion for non-looping animations
         if not self.loop and elapsed_time >= self.total_duration:
-            return self.frames[-1], True
+            return self.frame_count - 1, True
         
         # For looping animations, wrap around the elapsed time
         if self.loop:
             elapsed_time = elapsed_time % self.total_duration
         
-        # Find the correct frame based on the elapsed time
-        current_time = 0
-        for i, duration in enumerate(self.durations):
-            current_time += duration
-            if elapsed_time < current_time:
-                return self.frames[i], False
+        # Find the correct frame based on the elapsed time: the first one
+        # that ends after it
+        index = bisect_right(self.timeline, elapsed_time)
+        if index < self.frame_count:
+            return index, False
         
         # Failsafe - return the last frame
-        return self.frames[-1], False
+        return self.frame_count - 1, False
+
+    def get_frame_index_at_clock(self, clock_time):
+        """
+        Get the frame index for the shared clock, i.e. for every player
+        playing this animation in phase from time 0. It is only looked up
+        once per clock time, however many players ask.
+        
+        Args:
+            clock_time (int): Current time in milliseconds (pygame.time.get_ticks())
+            
+        Returns:
+            tuple: (frame index, is_animation_complete)
+        """
+        if clock_time != self.clock_time:
+            self.clock_time = clock_time
+            self.clock_frame = self.get_frame_index_at_time(clock_time)
+        return self.clock_frame
 
 
-class AnimationPlayer:
+class AnimationLibrary:
     """
-    Manages and plays animations from sprite sheets and JSON metadata.
+    Flyweight registry of sprite sheet animations.
+
+    Each sheet is loaded, its JSON parsed and its frames sliced once, and the
+    resulting Animation is shared by every AnimationPlayer that plays it.
+    Players only keep their own playback state (current animation, start
+    time, flip and scale). Shared animations must be treated as read-only.
     """
     def __init__(self):
-        """Initialize the animation player."""
-        self.animations = {}  # Dictionary of loaded animations by name
-        self.current_animation = None
-        self.current_animation_name = None
-        self.start_time = 0
-        self.is_playing = False
-        self.flip_x = False
-        self.flip_y = False
-        self.scaled_frames = {}  # Cache for scaled frames
-        self.scale_factor = (1.0, 1.0)  # (width_factor, height_factor)
-    
+        """Initialize an empty library."""
+        self.animations = {}  # (image path, JSON path) -> Animation
+
     def load_aseprite_animation(self, image_path, json_path=None, animation_name=None):
         """
-        Load animation from an Aseprite sprite sheet and JSON metadata.
+        Get the animation of an Aseprite sprite sheet, loading the sheet and
+        its JSON metadata the first time it is asked for.
         
         Args:
             image_path (str): Path to the sprite sheet image
             json_path (str, optional): Path to the JSON metadata file.
                 If None, tries to use the same path as image with .json extension.
-            animation_name (str, optional): Name to give this animation.
-                Defaults to the filename without extension.
+            animation_name (str, optional): Name to give this animation when
+                it is loaded. Defaults to the filename without extension.
                 
         Returns:
-            bool: True if loaded successfully, False otherwise
+            Animation: The shared animation, or None if the sheet couldn't be loaded
         """
+        # If json_path is not provided, try to infer it from image_path
+        if json_path is None:
+            base_path = os.path.splitext(image_path)[0]
+            json_path = base_path + ".json"
+
+        key = (image_path, json_path)
+        if key in self.animations:
+            return self.animations[key]
+
         # ======================= IMPROVED IMAGE LOADING WITH DETAILED DEBUGGING =======================
         # Load the sprite sheet image with better debug info
         sprite_sheet = load_image(image_path)
         if sprite_sheet is None:
             print(f"Error: Failed to load sprite sheet: {image_path}")
-            return False
+            return None
         
         # Print the image dimensions for debugging
         img_width, img_height = sprite_sheet.get_size()
         print(f"Loaded sprite sheet: {image_path} - Size: {img_width}x{img_height}")
-        # If json_path is not provided, try to infer it from image_path
-        if json_path is None:
-            base_path = os.path.splitext(image_path)[0]
-            json_path = base_path + ".json"
         
         # If animation_name is not provided, use the filename without extension
         if animation_name is None:
@@ -179,15 +292,14 @@ class AnimationPlayer:
             print(f"Loaded animation '{animation_name}' with {len(frames)} frames")
             
             # Create the animation object
-            self.animations[animation_name] = Animation(
+            animation = Animation(
                 name=animation_name,
                 frames=frames,
                 durations=frame_durations,
-                loop=True  # Default to looping, can be changed later
+                loop=True,  # Default to looping
+                sheet=key
             )
             
-            return True
-            
         except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
             print(f"Error loading JSON metadata: {e}")
             
@@ -230,13 +342,15 @@ class AnimationPlayer:
             print(f"Created fallback animation '{animation_name}' with {len(frames)} frames")
             
             # Create a simple animation with default timing
-            self.animations[animation_name] = Animation(
+            animation = Animation(
                 name=animation_name,
                 frames=frames,
-                loop=True
+                loop=True,
+                sheet=key
             )
-            
-            return True
+
+        self.animations[key] = animation
+        return animation
     
     def _extract_frame_number(self, frame_name):
         """
@@ -249,13 +363,73 @@ class AnimationPlayer:
         Returns:
             int: The extracted frame number, or 0 if none found
         """
-        import re
         # Try to extract a number from the frame name
         match = re.search(r'(\d+)', frame_name)
         if match:
             return int(match.group(1))
         return 0
     
+
+# Library used by players that aren't given their own
+default_library = AnimationLibrary()
+
+
+class AnimationPlayer:
+    """
+    Manages and plays animations from sprite sheets and JSON metadata.
+    """
+    def __init__(self, library=None, shared_clock=()):
+        """
+        Initialize the animation player.
+
+        Args:
+            library (AnimationLibrary, optional): Where sprite sheets are loaded
+                from. Defaults to the shared default_library.
+            shared_clock (iterable, optional): Names of looping animations (e.g.
+                a walk cycle) to play in phase with every other player of them
+                instead of from when play() was called, so a crowd resolves its
+                frame once per tick. Other animations, such as an attack, always
+                start at their first frame. Defaults to none.
+        """
+        self.library = library if library is not None else default_library
+        self.shared_clock = frozenset(shared_clock)
+        self.animations = {}  # Dictionary of animations by name (shared, read-only)
+        self.current_animation = None
+        self.current_animation_name = None
+        self.start_time = 0
+        self.is_playing = False
+        self.flip_x = False
+        self.flip_y = False
+        self.scale_factor = (1.0, 1.0)  # (width_factor, height_factor)
+    
+    def load_aseprite_animation(self, image_path, json_path=None, animation_name=None):
+        """
+        Add an animation from an Aseprite sprite sheet and JSON metadata.
+        The sheet comes from the player's AnimationLibrary, so it is only
+        loaded and sliced once however many players use it.
+        
+        Args:
+            image_path (str): Path to the sprite sheet image
+            json_path (str, optional): Path to the JSON metadata file.
+                If None, tries to use the same path as image with .json extension.
+            animation_name (str, optional): Name to give this animation.
+                Defaults to the filename without extension.
+                
+        Returns:
+            bool: True if loaded successfully, False otherwise
+        """
+        animation = self.library.load_aseprite_animation(image_path, json_path, animation_name)
+        if animation is None:
+            return False
+
+        # If animation_name is not provided, use the filename without extension
+        if animation_name is None:
+            animation_name = os.path.basename(os.path.splitext(image_path)[0])
+
+        self.animations[animation_name] = animation
+        self.prewarm([animation_name])
+        return True
+    
     def add_animation(self, name, frames, durations=None, loop=True):
         """
         Add a custom animation manually.
@@ -274,7 +448,24 @@ class AnimationPlayer:
             return False
             
         self.animations[name] = Animation(name, frames, durations, loop)
+        self.prewarm([name])
         return True
+
+    def prewarm(self, animation_names=None):
+        """
+        Bake the frames of animations at the current scale, facing both ways,
+        so drawing them never has to transform a surface.
+        
+        Args:
+            animation_names (list, optional): Animations to bake. Defaults to all.
+        """
+        if animation_names is None:
+            animation_names = list(self.animations)
+        for name in animation_names:
+            animation = self.animations[name]
+            for index in range(animation.frame_count):
+                for flip_x in (False, True):
+                    get_baked_frame(animation, index, self.scale_factor, flip_x, self.flip_y)
     
     def play(self, animation_name, force_restart=False):
         """
@@ -318,9 +509,6 @@ class AnimationPlayer:
             self.flip_x = flip_x
         if flip_y is not None:
             self.flip_y = flip_y
-            
-        # Clear scaled frames cache when flipping changes
-        self.scaled_frames = {}
     
     def set_scale(self, width_factor, height_factor=None):
         """
@@ -332,11 +520,10 @@ class AnimationPlayer:
         """
         height_factor = height_factor if height_factor is not None else width_factor
         
-        # Only update and clear cache if scale actually changed
+        # Only update and bake the new size if scale actually changed
         if self.scale_factor != (width_factor, height_factor):
             self.scale_factor = (width_factor, height_factor)
-            # Clear cache when scale changes
-            self.scaled_frames = {}
+            self.prewarm()
     
     def update(self):
         """
@@ -363,41 +550,25 @@ class AnimationPlayer:
         if not self.is_playing or not self.current_animation:
             return False
         
-        # Calculate elapsed time
-        current_time = pygame.time.get_ticks()
-        elapsed = frame_time if frame_time is not None else (current_time - self.start_time)
-        
         # Get the current frame
-        frame, is_complete = self.current_animation.get_frame_at_time(elapsed)
+        current_time = pygame.time.get_ticks()
+        if frame_time is not None:
+            index, is_complete = self.current_animation.get_frame_index_at_time(frame_time)
+        elif self.current_animation_name in self.shared_clock and self.current_animation.loop:
+            index, is_complete = self.current_animation.get_frame_index_at_clock(current_time)
+        else:
+            # Calculate elapsed time
+            elapsed = current_time - self.start_time
+            index, is_complete = self.current_animation.get_frame_index_at_time(elapsed)
         
         # Stop non-looping animations when complete
         if is_complete and not self.current_animation.loop:
             self.is_playing = False
         
         # ======================= FIXED FLIPPING AND SCALING =======================
-        # Apply scaling and flipping - create a unique key for caching
-        cache_key = (id(frame), self.scale_factor[0], self.scale_factor[1], self.flip_x, self.flip_y)
-        
-        # Check if we've already processed this frame
-        if cache_key not in self.scaled_frames:
-            # Process the frame
-            processed_frame = frame
-            
-            # Apply scaling if needed
-            if self.scale_factor != (1.0, 1.0):
-                width = int(frame.get_width() * self.scale_factor[0])
-                height = int(frame.get_height() * self.scale_factor[1])
-                processed_frame = pygame.transform.scale(frame, (width, height))
-            
-            # Apply flipping if needed - using explicit flags for clarity
-            if self.flip_x or self.flip_y:
-                processed_frame = pygame.transform.flip(processed_frame, self.flip_x, self.flip_y)
-            
-            # Cache the processed frame
-            self.scaled_frames[cache_key] = processed_frame
-        
-        # Get the processed frame from cache
-        processed_frame = self.scaled_frames[cache_key]
+        # Scaled and flipped frames come from the shared baked frame cache
+        processed_frame = get_baked_frame(self.current_animation, index, self.scale_factor,
+                                          self.flip_x, self.flip_y)
         # ===============================================================================
         
         # Draw the frame
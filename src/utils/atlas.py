@@ -0,0 +1,256 @@
+"""
+Texture atlas for the sprites loaded at startup.
+
+The player, sword, enemy and health bar sprites are packed into one or a few
+large pages with a manifest of where each sprite is. Every packed sprite is
+put in the texture cache as a region (subsurface) of its page, so
+load_image() - and with it AnimationPlayer, Player and Sword - cut their
+frames out of the atlas instead of out of separately loaded files.
+
+The atlas is built ahead of time with
+
+    python -m utils.atlas    (from the src folder)
+
+which writes the pages and manifest to assets/atlas, so startup opens one
+image instead of one per sprite sheet. If the saved atlas is missing or out of
+date, it is built in memory at startup instead.
+
+Startup only compares the size of each source file with the manifest (one
+stat per sprite, no file opens). Edits that keep the size, such as a palette
+change, are caught by comparing content hashes with
+
+    python -m utils.atlas --check
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import pygame
+
+from .utils import load_image, register_texture, get_asset_path
+
+# Sprites to pack: (file relative to the assets folder, size it is scaled to
+# or None). Player and sword sheets are packed at the size they are drawn at.
+SPRITES = [
+    ('images/player/Normal-Idle.png', (16 * 6 * 4, 16 * 4)),
+    ('images/player/Normal-Moving.png', (16 * 6 * 4, 16 * 4)),
+    ('images/player/Demon-Idle.png', (16 * 6 * 4, 16 * 4)),
+    ('images/player/Demon-Moving.png', (16 * 6 * 4, 16 * 4)),
+    ('images/sword/Sword-Idle.png', (16 * 6 * 3, 16 * 3)),
+    ('images/sword/Sword-Attack.png', (16 * 6 * 3, 16 * 3)),
+    ('images/Enemy/Enemy0/enemy0_walking.png', None),
+    ('images/Enemy/Enemy0/enemy0_attacking.png', None),
+    ('images/Enemy/Enemy1/enemy1_idle.png', None),
+    ('healthbar/bar1.jpeg', None),
+    ('healthbar/face.jpeg', None),
+]
+ATLAS_DIR = 'atlas'  # Relative to the assets folder
+MANIFEST = 'sprites.json'
+PAGE_SIZE = 1024
+PADDING = 1  # Transparent pixels between sprites
+
+
+class TextureAtlas:
+    """
+    Sprites packed into a few large surfaces, with a rect manifest.
+    """
+    def __init__(self, page_size=PAGE_SIZE, padding=PADDING):
+        """
+        Create an empty atlas.
+
+        Args:
+            page_size (int, optional): Largest width and height of a page. Defaults to 1024.
+            padding (int, optional): Pixels left between sprites. Defaults to 1.
+        """
+        self.page_size = page_size
+        self.padding = padding
+        self.pages = []  # pygame.Surface per page
+        self.regions = {}  # (file, size) -> (page index, pygame.Rect)
+
+    def pack(self, sprites):
+        """
+        Pack sprites into new pages, tallest first on shelves.
+
+        Args:
+            sprites (list): ((file, size), pygame.Surface) pairs
+        """
+        placements = []  # (key, surface, page index, x, y)
+        page_sizes = []
+        x = y = shelf_height = 0
+        order = sorted(sprites, key=lambda item: (-item[1].get_height(), -item[1].get_width()))
+        for key, surface in order:
+            width = surface.get_width() + self.padding
+            height = surface.get_height() + self.padding
+            if not page_sizes:
+                page_sizes.append([0, 0])
+            if x + width > self.page_size:
+                # Start a new shelf
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            if y + height > self.page_size and (x or y):
+                # Start a new page (sprites bigger than a page get their own)
+                page_sizes.append([0, 0])
+                x = y = shelf_height = 0
+            page = len(page_sizes) - 1 + len(self.pages)
+            placements.append((key, surface, page, x, y))
+            page_sizes[-1][0] = max(page_sizes[-1][0], x + width)
+            page_sizes[-1][1] = max(page_sizes[-1][1], y + height)
+            x += width
+            shelf_height = max(shelf_height, height)
+
+        for width, height in page_sizes:
+            page = pygame.Surface((width, height), pygame.SRCALPHA)
+            page.fill((0, 0, 0, 0))
+            self.pages.append(page.convert_alpha() if pygame.display.get_surface() else page)
+        for key, surface, page, x, y in placements:
+            # Copy the pixels as they are, alpha included
+            self.pages[page].blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            self.regions[key] = (page, pygame.Rect((x, y), surface.get_size()))
+
+    def get(self, filename, size=None):
+        """
+        Get a packed sprite as a region of its page.
+
+        Returns:
+            pygame.Surface: Subsurface of the page, or None if it isn't packed
+        """
+        region = self.regions.get((filename, tuple(size) if size is not None else None))
+        if region is None:
+            return None
+        page, rect = region
+        return self.pages[page].subsurface(rect)
+
+    def register(self):
+        """Serve every packed sprite from the atlas through load_image()."""
+        for filename, size in self.regions:
+            register_texture(filename, self.get(filename, size), size)
+
+    def save(self, directory=ATLAS_DIR):
+        """
+        Write the pages and the manifest to a folder in the assets folder.
+
+        Args:
+            directory (str, optional): Folder relative to the assets folder. Defaults to ATLAS_DIR.
+        """
+        path = get_asset_path(directory)
+        os.makedirs(path, exist_ok=True)
+        manifest = {"pages": [], "sprites": []}
+        for index, page in enumerate(self.pages):
+            name = f"sprites_{index}.png"
+            pygame.image.save(page, os.path.join(path, name))
+            manifest["pages"].append(name)
+        for (filename, size), (page, rect) in self.regions.items():
+            manifest["sprites"].append({
+                "file": filename,
+                "size": list(size) if size is not None else None,
+                "page": page,
+                "rect": [rect.x, rect.y, rect.width, rect.height],
+                # To notice when the source changed and the atlas is stale:
+                # the size is checked at startup, the hash by --check
+                "source_bytes": os.path.getsize(get_asset_path(filename)),
+                "source_sha1": _file_hash(filename),
+            })
+        with open(os.path.join(path, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, sprites=SPRITES, directory=ATLAS_DIR, check_contents=False):
+        """
+        Load a saved atlas.
+
+        Args:
+            sprites (list, optional): (file, size) the atlas has to contain. Defaults to SPRITES.
+            directory (str, optional): Folder relative to the assets folder. Defaults to ATLAS_DIR.
+            check_contents (bool, optional): Also hash every source file to
+                catch edits that kept its size. Defaults to False (sizes only).
+
+        Returns:
+            TextureAtlas: The atlas, or None if it is missing or out of date
+        """
+        path = get_asset_path(directory)
+        try:
+            with open(os.path.join(path, MANIFEST), 'r') as f:
+                manifest = json.load(f)
+            atlas = cls()
+            for entry in manifest["sprites"]:
+                size = tuple(entry["size"]) if entry["size"] is not None else None
+                source = get_asset_path(entry["file"])
+                if (not os.path.exists(source) or os.path.getsize(source) != entry["source_bytes"] or
+                        (check_contents and _file_hash(entry["file"]) != entry["source_sha1"])):
+                    print(f"Texture atlas is out of date ({entry['file']} changed)")
+                    return None
+                atlas.regions[(entry["file"], size)] = (entry["page"], pygame.Rect(entry["rect"]))
+            if set(atlas.regions) != {(filename, size) for filename, size in sprites}:
+                print("Texture atlas is out of date (sprite list changed)")
+                return None
+            for name in manifest["pages"]:
+                atlas.pages.append(pygame.image.load(os.path.join(path, name)).convert_alpha())
+            return atlas
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, pygame.error) as e:
+            print(f"Could not load texture atlas: {e}")
+            return None
+
+
+def _file_hash(filename):
+    """Get the SHA-1 of a file in the assets folder, or None if it is missing."""
+    try:
+        with open(get_asset_path(filename), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def build_atlas(sprites=SPRITES):
+    """
+    Pack sprites into a new atlas, loading them from their files.
+
+    Args:
+        sprites (list, optional): (file, size) to pack. Defaults to SPRITES.
+
+    Returns:
+        TextureAtlas: The atlas; sprites that fail to load are left out
+    """
+    images = []
+    for filename, size in sprites:
+        image = load_image(filename, size=size)
+        if image is not None:
+            images.append(((filename, size), image))
+    atlas = TextureAtlas()
+    atlas.pack(images)
+    return atlas
+
+
+def load_sprite_atlas(sprites=SPRITES):
+    """
+    Load the saved sprite atlas (or build it if needed) and serve the sprites
+    from it. Call once after the display is created, before loading sprites.
+
+    Returns:
+        TextureAtlas: The atlas in use
+    """
+    atlas = TextureAtlas.load(sprites)
+    if atlas is None:
+        print("Building the texture atlas in memory - run 'python -m utils.atlas' to save it")
+        atlas = build_atlas(sprites)
+    atlas.register()
+    print(f"Texture atlas: {len(atlas.regions)} sprites on {len(atlas.pages)} page(s)")
+    return atlas
+
+
+# Build step: pack the sprites and save the atlas to assets/atlas, or with
+# --check only report whether the saved atlas matches the source files
+if __name__ == "__main__":
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    if "--check" in sys.argv[1:]:
+        if TextureAtlas.load(check_contents=True) is None:
+            sys.exit(1)
+        print("Texture atlas is up to date")
+        sys.exit(0)
+    atlas = build_atlas()
+    atlas.save()
+    sizes = ", ".join(f"{page.get_width()}x{page.get_height()}" for page in atlas.pages)
+    print(f"Saved {len(atlas.regions)} sprites on {len(atlas.pages)} page(s): {sizes}")
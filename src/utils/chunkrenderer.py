@@ -0,0 +1,149 @@
+"""
+Chunked renderer for static level geometry.
+
+Tiles are baked into fixed-size chunk surfaces the first time the camera
+needs each chunk (or all at once with prewarm()). Each frame only the chunks
+that intersect the camera viewport are blitted, so the cost of drawing the
+level depends on the screen size rather than on how many tiles it has.
+
+The level can be given either as a list of Tile objects or as a TileGrid,
+in which case solid cells are drawn straight from the grid without ever
+creating a Tile per cell.
+"""
+
+import pygame
+from .tilegrid import TileGrid, SOLID
+from .utils import load_image
+
+
+class ChunkRenderer:
+    """
+    Pre-renders tiles into square chunk surfaces and draws only visible chunks.
+    """
+    def __init__(self, tiles, tile_size, chunk_tiles=16, tile_image=None):
+        """
+        Sort the tiles into chunks. Chunks are baked when first drawn.
+
+        Args:
+            tiles (list): Tile objects returned by parse_map, or a TileGrid
+            tile_size (int): Size of a tile in pixels
+            chunk_tiles (int, optional): Chunk width/height in tiles. Defaults to 16.
+            tile_image (pygame.Surface, optional): Texture for solid grid cells.
+                Defaults to stile.png scaled to the tile size.
+        """
+        self.tile_size = tile_size
+        self.chunk_size = tile_size * chunk_tiles
+        self.chunks = {}  # (chunk_x, chunk_y) -> list of tiles
+        self.surfaces = {}  # (chunk_x, chunk_y) -> baked pygame.Surface
+        self.dirty = set()  # Chunks that need to be (re-)baked before they are drawn
+
+        self.grid = tiles if isinstance(tiles, TileGrid) else None
+        self.tile_image = tile_image
+        self.tile_color = (100, 100, 100)  # Fallback, same as Tile
+
+        if self.grid is not None:
+            if self.tile_image is None:
+                self.tile_image = load_image('stile.png', size=(tile_size, tile_size))
+            self.invalidate(pygame.Rect(0, 0, self.grid.pixel_width, self.grid.pixel_height))
+        else:
+            for tile in tiles:
+                self.add_tile(tile)
+
+    def _chunks_for(self, rect):
+        """Yield the keys of every chunk a rect overlaps."""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        size = self.chunk_size
+        for chunk_y in range(int(rect.top) // size, (int(rect.bottom) - 1) // size + 1):
+            for chunk_x in range(int(rect.left) // size, (int(rect.right) - 1) // size + 1):
+                yield (chunk_x, chunk_y)
+
+    def add_tile(self, tile):
+        """Add a tile and mark the chunks it covers for re-baking."""
+        for key in self._chunks_for(tile.rect):
+            self.chunks.setdefault(key, []).append(tile)
+            self.dirty.add(key)
+
+    def remove_tile(self, tile):
+        """Remove a tile and mark the chunks it covered for re-baking."""
+        for key in self._chunks_for(tile.rect):
+            chunk_tiles = self.chunks.get(key)
+            if chunk_tiles and tile in chunk_tiles:
+                chunk_tiles.remove(tile)
+                self.dirty.add(key)
+
+    def invalidate(self, rect):
+        """
+        Mark every chunk overlapping a rect for re-baking, e.g. after a tile
+        image changed or cells in the TileGrid were edited.
+        """
+        for key in self._chunks_for(rect):
+            if self.grid is not None or key in self.chunks:
+                self.dirty.add(key)
+
+    def bake_dirty(self):
+        """Re-bake every chunk whose tiles changed since it was last baked."""
+        for key in self.dirty:
+            self._bake(key)
+        self.dirty.clear()
+
+    def prewarm(self):
+        """Bake every chunk now instead of when the camera first reaches it."""
+        self.bake_dirty()
+
+    def _chunk_tiles(self, key):
+        """Get (rect, image, color) for every tile in a chunk."""
+        if self.grid is None:
+            return [(tile.rect, tile.image, tile.color) for tile in self.chunks.get(key, ())]
+        chunk_rect = pygame.Rect(key[0] * self.chunk_size, key[1] * self.chunk_size,
+                                 self.chunk_size, self.chunk_size)
+        return [(cell, self.tile_image, self.tile_color)
+                for cell in self.grid.query(chunk_rect, SOLID)]
+
+    def _bake(self, key):
+        """Render all tiles of one chunk into its surface."""
+        chunk_tiles = self._chunk_tiles(key)
+        if not chunk_tiles:
+            # Nothing left to draw here - drop the chunk entirely
+            self.chunks.pop(key, None)
+            self.surfaces.pop(key, None)
+            return
+
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+            self.surfaces[key] = surface
+        surface.fill((0, 0, 0, 0))
+
+        origin_x = key[0] * self.chunk_size
+        origin_y = key[1] * self.chunk_size
+        for rect, image, color in chunk_tiles:
+            position = (rect.x - origin_x, rect.y - origin_y)
+            if image:
+                # The chunk starts fully transparent (all zeros) and tiles
+                # never overlap, so BLEND_RGBA_MAX leaves each tile's pixels,
+                # alpha included, as they are. Alpha blending onto the empty
+                # chunk would change them; this keeps the final blit identical
+                # to blitting each tile straight onto the screen.
+                surface.blit(image, position, special_flags=pygame.BLEND_RGBA_MAX)
+            else:
+                pygame.draw.rect(surface, color, pygame.Rect(position, rect.size))
+
+    def draw(self, surface, camera):
+        """
+        Draw the chunks visible through the camera, baking any of them that
+        are new or changed.
+
+        Args:
+            surface (pygame.Surface): Surface to draw on
+            camera (Camera): Camera providing the view offset and size
+        """
+        for key in self._chunks_for(camera.viewport):
+            if key in self.dirty:
+                self._bake(key)
+                self.dirty.discard(key)
+            chunk_surface = self.surfaces.get(key)
+            if chunk_surface is not None:
+                surface.blit(chunk_surface, (key[0] * self.chunk_size - camera.x,
+                                             key[1] * self.chunk_size - camera.y))
+
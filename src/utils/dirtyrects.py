@@ -0,0 +1,143 @@
+"""
+Dirty-rectangle display updates.
+
+The frame is still drawn to the screen surface as usual, but instead of
+flipping the whole window every frame, draw code marks the screen regions it
+changed and only those are pushed with pygame.display.update(rects). When
+most of the screen changed anyway (the camera scrolled, a full-screen layer
+moved) a single full flip is cheaper, so the tracker falls back to that.
+"""
+
+import math
+
+import pygame
+
+
+class DirtyRects:
+    """
+    Collects the screen regions changed during a frame and presents them.
+
+    Regions marked in the previous frame are pushed again, so something that
+    moved (or disappeared) is cleaned up where it used to be without having
+    to mark its old position.
+    """
+    def __init__(self, width, height, full_threshold=0.6):
+        """
+        Create a tracker for a screen.
+
+        Args:
+            width (int): Screen width in pixels
+            height (int): Screen height in pixels
+            full_threshold (float, optional): Fraction of the screen above
+                which a full flip is used instead. Defaults to 0.6.
+        """
+        self.screen_rect = pygame.Rect(0, 0, width, height)
+        self.full_threshold = full_threshold
+        self.rects = []  # Regions changed this frame
+        self.in_place_rects = []  # Regions changed this frame that aren't pushed again next frame
+        self.previous_rects = []  # Regions changed last frame
+        self.full = True  # The first frame always goes out in full
+
+        # Statistics
+        self.coverage = 1.0  # Fraction of the screen pushed in the last frame
+        self.frames = 0
+        self.full_frames = 0
+        self.total_coverage = 0.0
+
+    def mark(self, rect, margin=0):
+        """
+        Mark a screen region as changed.
+
+        Args:
+            rect (pygame.Rect): Region in screen coordinates
+            margin (int, optional): Pixels to grow the region by on each side. Defaults to 0.
+        """
+        if margin:
+            rect = rect.inflate(margin * 2, margin * 2)
+        rect = rect.clip(self.screen_rect)
+        if rect.width > 0 and rect.height > 0:
+            self.rects.append(rect)
+
+    def mark_in_place(self, rect):
+        """
+        Mark a region whose content changed but didn't move, e.g. a layer
+        that scrolled within its band. Unlike mark(), it isn't pushed again
+        next frame, as there is nothing left behind to clean up.
+
+        Args:
+            rect (pygame.Rect): Region in screen coordinates
+        """
+        rect = rect.clip(self.screen_rect)
+        if rect.width > 0 and rect.height > 0:
+            self.in_place_rects.append(rect)
+
+    def mark_box(self, x, y, width, height, margin=0):
+        """mark() for a box given as numbers. Fractions are rounded outwards."""
+        left = math.floor(x) - margin
+        top = math.floor(y) - margin
+        right = math.ceil(x + width) + margin
+        bottom = math.ceil(y + height) + margin
+        self.mark(pygame.Rect(left, top, right - left, bottom - top))
+
+    def mark_all(self):
+        """Mark the whole screen as changed."""
+        self.full = True
+
+    def _merged(self, rects):
+        """Merge overlapping rects, so the list is shorter and areas don't double count."""
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def present(self):
+        """
+        Push this frame's changes to the display and start a new frame.
+
+        Returns:
+            float: Fraction of the screen that was pushed (1.0 for a full flip)
+        """
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        rects = []
+        if not self.full:
+            rects = self._merged(self.rects + self.in_place_rects + self.previous_rects)
+            area = sum(rect.width * rect.height for rect in rects)
+            if area > screen_area * self.full_threshold:
+                self.full = True
+            else:
+                self.coverage = area / screen_area
+
+        if self.full:
+            pygame.display.flip()
+            self.coverage = 1.0
+            self.full_frames += 1
+        elif rects:
+            pygame.display.update(rects)
+
+        self.frames += 1
+        self.total_coverage += self.coverage
+        self.previous_rects = self.rects
+        self.rects = []
+        self.in_place_rects = []
+        self.full = False
+        return self.coverage
+
+    def get_stats(self):
+        """
+        Get display update statistics.
+
+        Returns:
+            dict: frames, full_frames, coverage (last frame) and
+            average_coverage, as fractions of the screen
+        """
+        return {
+            'frames': self.frames,
+            'full_frames': self.full_frames,
+            'coverage': self.coverage,
+            'average_coverage': self.total_coverage / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,287 @@
+"""
+Compiled binary level format.
+
+Levels are authored as text (the list of strings used by parse_map and saved
+by MapEditor.save_map). This module compiles that text into a binary file
+that holds everything the game needs already laid out, so loading is a header
+read plus a few block copies out of a memory-mapped file, with no per-cell
+parsing in Python.
+
+File layout (little-endian):
+    header      - see HEADER below
+    tile kinds  - width * height bytes, row-major, one map character per cell
+    enemy spawns, flying enemy spawns - (x, y) int32 pairs
+    death zones, colliders            - (x, y, w, h) int32 rects
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+# Allow running directly as a compiler script. The script's own folder is
+# replaced with src/ so "utils" resolves to the package, not utils/utils.py.
+if __name__ == "__main__":
+    sys.path[0] = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    from utils.tilegrid import TileGrid, SOLID, DEATH, PLAYER_SPAWN, ENEMY_SPAWN, FLYING_SPAWN
+    from utils.tileindex import TileIndex
+    from utils.platformspans import PlatformSpans
+    from utils.utils import parse_map, merge_cells
+else:
+    from .tilegrid import TileGrid, SOLID, DEATH, PLAYER_SPAWN, ENEMY_SPAWN, FLYING_SPAWN
+    from .tileindex import TileIndex
+    from .platformspans import PlatformSpans
+    from .utils import parse_map, merge_cells
+
+MAGIC = b"MKLV"
+VERSION = 1
+
+# magic, version, tile_size, width, height, has_player_spawn, player_x, player_y,
+# enemy count, flying enemy count, death zone count, collider count
+HEADER = struct.Struct("<4sHHIIBxxxiiIIII")
+POINT = struct.Struct("<ii")
+RECT = struct.Struct("<iiii")
+
+# Compiled level the game loads (main.LEVEL_FILE) and the map editor compiles to
+LEVEL_FILE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                           '../../levels/level1.mkl'))
+
+# Largest merged collider / death zone span, in cells. Keeps the cost of
+# splitting a merged rect when one of its cells is edited bounded.
+MAX_MERGE = 16
+
+
+class Level:
+    """
+    Everything parsed out of a level map: the tile grid, spawn positions,
+    merged death zone spans, merged solid colliders and the walkable
+    platform spans of each row.
+
+    death_zones and colliders are TileIndex objects (iterable like the lists
+    they are built from). Use set_cell to edit the level - it updates the
+    grid, colliders, death zones, platforms and spawns in place without a
+    reparse.
+    """
+    def __init__(self, grid, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones, colliders):
+        self.grid = grid
+        self.player_spawn = player_spawn
+        self.enemy_spawns = enemy_spawns
+        self.flying_enemy_spawns = flying_enemy_spawns
+        self.death_zones = TileIndex(death_zones, grid.tile_size)
+        self.colliders = TileIndex(colliders, grid.tile_size)
+        # Derived from the grid rather than stored in the level file
+        self.platforms = PlatformSpans(grid)
+        # Called with the cell rect after every edit, e.g. ChunkRenderer.invalidate
+        self.listeners = []
+
+    @classmethod
+    def from_map(cls, level_map, tile_size):
+        """Parse a text level map (list of strings or TileGrid)."""
+        grid, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones = parse_map(
+            level_map, tile_size, None, merge=True, max_merge=MAX_MERGE)
+        colliders = merge_cells(grid, tile_size, '#', max_size=MAX_MERGE)
+        return cls(grid, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones, colliders)
+
+    @property
+    def tile_size(self):
+        return self.grid.tile_size
+
+    def set_cell(self, col, row, char):
+        """
+        Change one cell of the level.
+
+        Only the merged collider or death zone containing the cell and its
+        direct neighbours are touched, so an edit costs O(MAX_MERGE^2) at
+        worst no matter how big the level is.
+
+        Args:
+            col (int): Column of the cell
+            row (int): Row of the cell
+            char (str): New map character ('#', 'X', '.', 'S', 'E' or 'F')
+
+        Returns:
+            bool: True if the cell changed
+        """
+        kind = ord(char)
+        old_kind = self.grid.kind_at(col, row)
+        if kind == old_kind:
+            return False
+        self.grid.set_kind(col, row, kind)
+
+        cell = self.grid.cell_rect(col, row)
+        for index, index_kind in ((self.colliders, SOLID), (self.death_zones, DEATH)):
+            if old_kind == index_kind:
+                self._cut_cell(index, cell)
+            if kind == index_kind:
+                self._add_cell(index, cell)
+        if SOLID in (old_kind, kind):
+            # The cell's row and the row it is the "space above" of
+            self.platforms.rebuild_row(row)
+            self.platforms.rebuild_row(row + 1)
+
+        position = cell.topleft
+        if old_kind == PLAYER_SPAWN and self.player_spawn == position:
+            self.player_spawn = None
+        elif old_kind == ENEMY_SPAWN:
+            self.enemy_spawns.remove(position)
+        elif old_kind == FLYING_SPAWN:
+            self.flying_enemy_spawns.remove(position)
+
+        if kind == PLAYER_SPAWN:
+            self.player_spawn = position
+        elif kind == ENEMY_SPAWN:
+            self.enemy_spawns.append(position)
+        elif kind == FLYING_SPAWN:
+            self.flying_enemy_spawns.append(position)
+
+        for listener in self.listeners:
+            listener(cell)
+        return True
+
+    def _cut_cell(self, index, cell):
+        """Split the merged rect containing a cell into the pieces around it."""
+        for merged in index.query(cell):
+            index.remove(merged)
+            pieces = (
+                # Full-width bands above and below the cell's row
+                pygame.Rect(merged.left, merged.top, merged.width, cell.top - merged.top),
+                pygame.Rect(merged.left, cell.bottom, merged.width, merged.bottom - cell.bottom),
+                # The rest of the cell's row, left and right of it
+                pygame.Rect(merged.left, cell.top, cell.left - merged.left, cell.height),
+                pygame.Rect(cell.right, cell.top, merged.right - cell.right, cell.height),
+            )
+            for piece in pieces:
+                if piece.width > 0 and piece.height > 0:
+                    index.add(piece)
+
+    def _add_cell(self, index, cell):
+        """Add a cell, joining it with single-row rects directly left and right of it."""
+        merged = cell
+        max_width = MAX_MERGE * self.tile_size
+        for probe_x in (cell.left - 1, cell.right):
+            probe = pygame.Rect(probe_x, cell.top, 1, cell.height)
+            for neighbour in index.query(probe):
+                if (neighbour.top == cell.top and neighbour.height == cell.height
+                        and merged.union(neighbour).width <= max_width):
+                    index.remove(neighbour)
+                    merged = merged.union(neighbour)
+        index.add(merged)
+
+
+def read_map_file(path):
+    """Read a text level file in the format written by MapEditor.save_map."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def save_level(level, path):
+    """
+    Write a level to a compiled binary file.
+
+    Args:
+        level (Level): Level to write
+        path (str): Output file path
+    """
+    grid = level.grid
+    has_spawn = level.player_spawn is not None
+    spawn_x, spawn_y = level.player_spawn if has_spawn else (0, 0)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, grid.tile_size, grid.width, grid.height,
+            has_spawn, spawn_x, spawn_y,
+            len(level.enemy_spawns), len(level.flying_enemy_spawns),
+            len(level.death_zones), len(level.colliders)
+        ))
+        f.write(grid.kinds)
+        for x, y in level.enemy_spawns:
+            f.write(POINT.pack(x, y))
+        for x, y in level.flying_enemy_spawns:
+            f.write(POINT.pack(x, y))
+        for rect in level.death_zones:
+            f.write(RECT.pack(*rect))
+        for rect in level.colliders:
+            f.write(RECT.pack(*rect))
+
+
+def compile_level(map_path, out_path, tile_size=32):
+    """
+    Compile a text level file into a binary level file.
+
+    Returns:
+        Level: The compiled level
+    """
+    level = Level.from_map(read_map_file(map_path), tile_size)
+    save_level(level, out_path)
+    return level
+
+
+def load_level_file(path):
+    """
+    Load a compiled binary level through mmap.
+
+    The tile grid is a single block copy out of the mapping (so it can still
+    be edited in memory); spawn tables and rect tables are unpacked straight
+    from the mapped bytes.
+
+    Args:
+        path (str): Path to a file written by save_level/compile_level
+
+    Returns:
+        Level: The loaded level
+
+    Raises:
+        ValueError: If the file is not a compiled level, has the wrong
+            version or is truncated
+    """
+    with open(path, 'rb') as f:
+        # mmap refuses empty files, so check the size before mapping
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise ValueError(f"{path} is too small to be a compiled level")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            (magic, version, tile_size, width, height, has_spawn, spawn_x, spawn_y,
+             enemy_count, flying_count, death_count, collider_count) = HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a compiled level")
+            if version != VERSION:
+                raise ValueError(f"{path} has level format version {version}, expected {VERSION}")
+            expected_size = (HEADER.size + width * height +
+                             POINT.size * (enemy_count + flying_count) +
+                             RECT.size * (death_count + collider_count))
+            if len(data) < expected_size:
+                raise ValueError(f"{path} is truncated ({len(data)} of {expected_size} bytes)")
+
+            offset = HEADER.size
+            kinds = bytearray(data[offset:offset + width * height])
+            offset += width * height
+
+            def read(struct_type, count):
+                nonlocal offset
+                end = offset + struct_type.size * count
+                values = list(struct_type.iter_unpack(data[offset:end]))
+                offset = end
+                return values
+
+            enemy_spawns = read(POINT, enemy_count)
+            flying_enemy_spawns = read(POINT, flying_count)
+            death_zones = [pygame.Rect(rect) for rect in read(RECT, death_count)]
+            colliders = [pygame.Rect(rect) for rect in read(RECT, collider_count)]
+
+    grid = TileGrid(width, height, tile_size, kinds)
+    player_spawn = (spawn_x, spawn_y) if has_spawn else None
+    return Level(grid, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones, colliders)
+
+
+# Compile a level from the command line:
+#   python src/utils/levelfile.py map.txt levels/level1.mkl [tile_size]
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: levelfile.py <map.txt> <output.mkl> [tile_size]")
+        sys.exit(1)
+    tile_size = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    level = compile_level(sys.argv[1], sys.argv[2], tile_size)
+    print(f"Compiled {sys.argv[1]} -> {sys.argv[2]} "
+          f"({level.grid.width}x{level.grid.height}, {len(level.colliders)} colliders, "
+          f"{len(level.death_zones)} death zones)")
@@ -0,0 +1,263 @@
+"""
+Occluder geometry and visibility polygons for 2D shadow casting.
+
+The outline of the solid parts of a level is turned into a list of
+axis-aligned wall segments once: every edge between a solid and a non-solid
+cell, with collinear neighbours merged into one segment. Segments are
+bucketed in a coarse grid so a light only looks at the walls near it.
+
+A light's visibility polygon is found by casting rays at the segment
+endpoints around it. Polygons are cached per (cell, radius): they are cast
+from the centre of the cell the light is in, so a light only has to be
+recomputed when it crosses a cell boundary.
+
+When a cell is edited, only the wall runs on the four grid lines around it
+are recomputed, and only the cached polygons that could reach it dropped.
+"""
+
+import math
+
+from .tilegrid import SOLID
+
+
+class Occluders:
+    """
+    Wall segments of a level and cached visibility polygons for lights.
+    """
+    def __init__(self, grid, bucket_tiles=8, max_cached=4096):
+        """
+        Build the occluder segments.
+
+        Args:
+            grid (TileGrid): Level grid; solid cells block light
+            bucket_tiles (int, optional): Size of a segment bucket in tiles. Defaults to 8.
+            max_cached (int, optional): Visibility polygons kept before the
+                cache is cleared. Defaults to 4096.
+        """
+        self.grid = grid
+        self.tile_size = grid.tile_size
+        self.bucket_size = grid.tile_size * bucket_tiles
+        self.max_cached = max_cached
+        self.segments = set()  # (x1, y1, x2, y2), horizontal or vertical
+        self.buckets = {}  # (col, row) -> set of segments
+        self.polygons = {}  # (cell col, cell row, radius) -> polygon or None
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild all segments from the grid."""
+        self.segments = set()
+        self.buckets = {}
+        for row in range(self.grid.height + 1):
+            self._add_segments(self._edge_runs(True, row, 0, self.grid.width))
+        for col in range(self.grid.width + 1):
+            self._add_segments(self._edge_runs(False, col, 0, self.grid.height))
+        self.polygons.clear()
+
+    def invalidate(self, rect):
+        """
+        Level listener: a cell changed, so update the walls around it.
+
+        Only the runs on the grid lines along the cell's four sides can
+        change. The segments on those lines that touch the cell are removed
+        and the runs over the span they covered are found again.
+
+        Args:
+            rect (pygame.Rect): The changed cell
+        """
+        size = self.tile_size
+        col = rect.x // size
+        row = rect.y // size
+        near = self.near(rect.left, rect.top, rect.right, rect.bottom)
+        for horizontal, line, cell in ((True, row, col), (True, row + 1, col),
+                                       (False, col, row), (False, col + 1, row)):
+            # Segments on this line touching the cell; runs are maximal, so no
+            # other segment on the line touches these
+            on_line = [segment for segment in near
+                       if self._on_line(segment, horizontal, line * size)]
+            start, stop = cell, cell + 1
+            for segment in on_line:
+                left, top, right, bottom = self._bounds(segment)
+                if horizontal:
+                    start, stop = min(start, left // size), max(stop, right // size)
+                else:
+                    start, stop = min(start, top // size), max(stop, bottom // size)
+            self._remove_segments(on_line)
+            self._add_segments(self._edge_runs(horizontal, line, start, stop))
+
+        # Drop the polygons of lights whose reach overlaps the cell
+        for key in list(self.polygons):
+            light_col, light_row, radius = key
+            reach = radius + size
+            origin_x = (light_col + 0.5) * size
+            origin_y = (light_row + 0.5) * size
+            if (origin_x - reach <= rect.right and origin_x + reach >= rect.left and
+                    origin_y - reach <= rect.bottom and origin_y + reach >= rect.top):
+                del self.polygons[key]
+
+    @staticmethod
+    def _on_line(segment, horizontal, position):
+        """Whether a segment lies along a horizontal (y) or vertical (x) grid line."""
+        x1, y1, x2, y2 = segment
+        if horizontal:
+            return y1 == y2 == position
+        return x1 == x2 == position
+
+    def _edge_runs(self, horizontal, line, start, stop):
+        """
+        Find the edges between solid and non-solid cells along one grid line,
+        merged into runs.
+
+        Args:
+            horizontal (bool): Whether the line is the top of row `line`
+                (otherwise the left of column `line`)
+            line (int): Row or column of the line
+            start (int): First cell along the line to look at
+            stop (int): Cell along the line to stop before
+
+        Returns:
+            list: (x1, y1, x2, y2) segments
+        """
+        grid = self.grid
+        size = self.tile_size
+        segments = []
+
+        def solid(col, row):
+            return grid.kind_at(col, row) == SOLID
+
+        run_start = None
+        for i in range(start, stop + 1):
+            if i >= stop:
+                edge = False
+            elif horizontal:
+                edge = solid(i, line - 1) != solid(i, line)
+            else:
+                edge = solid(line - 1, i) != solid(line, i)
+            if edge and run_start is None:
+                run_start = i
+            elif not edge and run_start is not None:
+                if horizontal:
+                    segments.append((run_start * size, line * size, i * size, line * size))
+                else:
+                    segments.append((line * size, run_start * size, line * size, i * size))
+                run_start = None
+        return segments
+
+    def _add_segments(self, segments):
+        """Add segments and put them in their buckets."""
+        for segment in segments:
+            self.segments.add(segment)
+            for key in self._buckets_for(*self._bounds(segment)):
+                self.buckets.setdefault(key, set()).add(segment)
+
+    def _remove_segments(self, segments):
+        """Remove segments from the segment set and their buckets."""
+        for segment in segments:
+            self.segments.discard(segment)
+            for key in self._buckets_for(*self._bounds(segment)):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(segment)
+                    if not bucket:
+                        del self.buckets[key]
+
+    @staticmethod
+    def _bounds(segment):
+        """(left, top, right, bottom) of a segment."""
+        x1, y1, x2, y2 = segment
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    def _buckets_for(self, left, top, right, bottom):
+        """Yield the bucket keys a box (edges inclusive) touches."""
+        size = self.bucket_size
+        for row in range(int(top) // size, int(bottom) // size + 1):
+            for col in range(int(left) // size, int(right) // size + 1):
+                yield (col, row)
+
+    def near(self, left, top, right, bottom):
+        """
+        Get the segments that touch a box.
+
+        Returns:
+            list: (x1, y1, x2, y2) segments
+        """
+        found = set()
+        for key in self._buckets_for(left, top, right, bottom):
+            found.update(self.buckets.get(key, ()))
+        segments = []
+        for segment in sorted(found):
+            seg_left, seg_top, seg_right, seg_bottom = self._bounds(segment)
+            if seg_left <= right and seg_right >= left and seg_top <= bottom and seg_bottom >= top:
+                segments.append(segment)
+        return segments
+
+    def visibility(self, x, y, radius):
+        """
+        Get the area a light can reach, as a polygon in level coordinates.
+
+        The polygon is cast from the centre of the cell containing (x, y) and
+        cached, so it only changes when the light moves to another cell.
+
+        Args:
+            x (float): Light x in level pixels
+            y (float): Light y in level pixels
+            radius (int): Light radius in pixels
+
+        Returns:
+            tuple: Polygon points, or None if nothing near the light casts a
+            shadow (or the light is inside a wall), in which case the light
+            should be drawn unshadowed
+        """
+        size = self.tile_size
+        col = int(x) // size
+        row = int(y) // size
+        key = (col, row, int(radius))
+        if key in self.polygons:
+            return self.polygons[key]
+
+        if len(self.polygons) >= self.max_cached:
+            self.polygons.clear()
+        polygon = None
+        if self.grid.kind_at(col, row) != SOLID:
+            polygon = self._cast((col + 0.5) * size, (row + 0.5) * size, int(radius) + size)
+        self.polygons[key] = polygon
+        return polygon
+
+    def _cast(self, origin_x, origin_y, reach):
+        """Cast the visibility polygon from a point, limited to a square of half-size reach."""
+        left, top = origin_x - reach, origin_y - reach
+        right, bottom = origin_x + reach, origin_y + reach
+        walls = self.near(left, top, right, bottom)
+        if not walls:
+            return None
+        # The edges of the square stop rays that hit nothing
+        walls += [(left, top, right, top), (left, bottom, right, bottom),
+                  (left, top, left, bottom), (right, top, right, bottom)]
+
+        # Cast at every corner, and just either side of it to see past it
+        angles = set()
+        for x1, y1, x2, y2 in walls:
+            for point_x, point_y in ((x1, y1), (x2, y2)):
+                if left <= point_x <= right and top <= point_y <= bottom:
+                    angle = math.atan2(point_y - origin_y, point_x - origin_x)
+                    angles.update((angle - 0.0001, angle, angle + 0.0001))
+
+        polygon = []
+        for angle in sorted(angles):
+            dx = math.cos(angle)
+            dy = math.sin(angle)
+            nearest = math.inf
+            for x1, y1, x2, y2 in walls:
+                if y1 == y2:  # Horizontal wall
+                    if dy == 0:
+                        continue
+                    t = (y1 - origin_y) / dy
+                    if 0 < t < nearest and min(x1, x2) <= origin_x + dx * t <= max(x1, x2):
+                        nearest = t
+                else:  # Vertical wall
+                    if dx == 0:
+                        continue
+                    t = (x1 - origin_x) / dx
+                    if 0 < t < nearest and min(y1, y2) <= origin_y + dy * t <= max(y1, y2):
+                        nearest = t
+            polygon.append((origin_x + dx * nearest, origin_y + dy * nearest))
+        return tuple(polygon)
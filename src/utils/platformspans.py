@@ -0,0 +1,144 @@
+"""
+Per-row table of walkable platform spans.
+
+A walkable cell is a solid cell with open (non-solid) space above it - the
+cells a walking enemy can stand on. For every row of a TileGrid the table
+keeps the contiguous runs of walkable cells as sorted pixel spans, so "is
+there floor under this x range" is a binary search over one row instead of a
+collision scan over the level.
+"""
+
+from bisect import bisect_left
+
+from .tilegrid import SOLID
+
+
+class PlatformSpans:
+    """
+    Sorted walkable spans for each row of a TileGrid.
+
+    Spans are (left, right) pixel ranges, right exclusive, in the same
+    coordinates as the level rects. Call rebuild_row after editing cells;
+    each row counts its rebuilds in `versions`, so users of a row can notice
+    it changed.
+    """
+    def __init__(self, grid):
+        """
+        Build the table.
+
+        Args:
+            grid (TileGrid): Level grid to scan
+        """
+        self.grid = grid
+        self.tile_size = grid.tile_size
+        self.spans = [[] for _ in range(grid.height)]  # row -> [(left, right), ...]
+        self.lefts = [[] for _ in range(grid.height)]  # row -> span lefts, for bisect
+        self.versions = [0] * grid.height  # row -> times it was rebuilt
+        for row in range(grid.height):
+            self.rebuild_row(row)
+
+    def rebuild_row(self, row):
+        """
+        Recompute the spans of one row. A cell edit changes the spans of its
+        own row and of the row below it.
+        """
+        if not 0 <= row < self.grid.height:
+            return
+        grid = self.grid
+        size = self.tile_size
+        start = row * grid.width
+        cells = grid.kinds[start:start + grid.width]
+        above = grid.kinds[start - grid.width:start] if row > 0 else bytes(grid.width)
+
+        spans = []
+        span_start = None
+        for col in range(grid.width):
+            walkable = cells[col] == SOLID and above[col] != SOLID
+            if walkable and span_start is None:
+                span_start = col
+            elif not walkable and span_start is not None:
+                spans.append((span_start * size, col * size))
+                span_start = None
+        if span_start is not None:
+            spans.append((span_start * size, grid.width * size))
+
+        self.spans[row] = spans
+        self.lefts[row] = [left for left, _ in spans]
+        self.versions[row] += 1
+
+    def _row_at(self, y):
+        """Row whose top edge is at pixel y, or None if y is not on a row top."""
+        row, offset = divmod(int(y), self.tile_size)
+        if offset or not 0 <= row < len(self.spans):
+            return None
+        return row
+
+    def version_at(self, y):
+        """Get the rebuild count of the row whose top edge is at pixel y, or None."""
+        row = self._row_at(y)
+        return self.versions[row] if row is not None else None
+
+    def span_at(self, left, right, y):
+        """
+        Find a walkable span overlapping a horizontal range at a floor height.
+
+        Args:
+            left (int): Left edge of the range in pixels
+            right (int): Right edge of the range in pixels (exclusive)
+            y (int): Floor height - the top edge of a row, e.g. an entity's rect.bottom
+
+        Returns:
+            tuple: (left, right) of the rightmost overlapping span, or None
+        """
+        row = self._row_at(y)
+        if row is None or left >= right:
+            return None
+        # Spans don't overlap, so the last span starting before `right` has
+        # the largest right edge of all candidates.
+        index = bisect_left(self.lefts[row], right) - 1
+        if index >= 0 and self.spans[row][index][1] > left:
+            return self.spans[row][index]
+        return None
+
+    def has_floor(self, left, right, y):
+        """Return True if any walkable span overlaps the range at floor height y."""
+        return self.span_at(left, right, y) is not None
+
+    def floor_below(self, left, right, y):
+        """
+        Find the first floor at or below a height under a horizontal range,
+        e.g. where an entity spawned in the air will land.
+
+        Returns:
+            tuple: (floor_y, span) or None if there is no floor below
+        """
+        size = self.tile_size
+        first_row = max(0, -(-int(y) // size))
+        for row in range(first_row, len(self.spans)):
+            span = self.span_at(left, right, row * size)
+            if span is not None:
+                return row * size, span
+        return None
+
+    def reach(self, span, y, max_gap):
+        """
+        Extend a span across neighbouring spans in its row separated by gaps
+        narrower than max_gap - gaps too small for something max_gap wide to
+        drop through.
+
+        Returns:
+            tuple: (left, right) of the joined range
+        """
+        row = self._row_at(y)
+        spans = self.spans[row]
+        index = spans.index(span)
+        left, right = span
+        for prev_left, prev_right in reversed(spans[:index]):
+            if left - prev_right >= max_gap:
+                break
+            left = prev_left
+        for next_left, next_right in spans[index + 1:]:
+            if next_left - right >= max_gap:
+                break
+            right = next_right
+        return left, right
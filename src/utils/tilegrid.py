@@ -0,0 +1,214 @@
+"""
+Compact array-backed tile grid.
+
+A level is stored as one byte per cell in a flat bytearray instead of a list
+of Tile objects. The byte for a cell is the map character itself ('#', 'X',
+'.', ...), so a grid converts to and from the text level format for free.
+Cell lookups are O(1) and rect queries only visit the cells a rect overlaps.
+"""
+
+import pygame
+
+# Tile kinds - the byte value of the matching level map character
+EMPTY = ord('.')
+SOLID = ord('#')
+DEATH = ord('X')
+PLAYER_SPAWN = ord('S')
+ENEMY_SPAWN = ord('E')
+FLYING_SPAWN = ord('F')
+
+
+class TileGrid:
+    """
+    Level layout as a width x height array of tile kinds.
+
+    Also usable anywhere a level map (list of strings) is expected: len(grid)
+    is the number of rows, and indexing or iterating yields rows as strings.
+    """
+    def __init__(self, width, height, tile_size, kinds=None):
+        """
+        Create a grid.
+
+        Args:
+            width (int): Number of columns
+            height (int): Number of rows
+            tile_size (int): Size of each tile in pixels
+            kinds (bytearray, optional): Row-major cell kinds. Defaults to all EMPTY.
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        if kinds is None:
+            kinds = bytearray([EMPTY]) * (width * height)
+        if len(kinds) != width * height:
+            raise ValueError(f"Expected {width * height} cells, got {len(kinds)}")
+        self.kinds = kinds
+
+    @classmethod
+    def from_map(cls, level_map, tile_size):
+        """
+        Build a grid from a level map represented as a list of strings.
+        Short rows are padded with empty cells.
+        """
+        width = max((len(row) for row in level_map), default=0)
+        kinds = bytearray()
+        for row in level_map:
+            kinds += row.ljust(width, '.').encode('ascii')
+        return cls(width, len(level_map), tile_size, kinds)
+
+    def to_map(self):
+        """Convert the grid back to a list of strings."""
+        return [self[row] for row in range(self.height)]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return (self[row] for row in range(self.height))
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.height
+        if not 0 <= row < self.height:
+            raise IndexError("row out of range")
+        start = row * self.width
+        return self.kinds[start:start + self.width].decode('ascii')
+
+    @property
+    def pixel_width(self):
+        return self.width * self.tile_size
+
+    @property
+    def pixel_height(self):
+        return self.height * self.tile_size
+
+    def kind_at(self, col, row):
+        """Get the kind of a cell. Cells outside the grid are EMPTY."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.kinds[row * self.width + col]
+        return EMPTY
+
+    def set_kind(self, col, row, kind):
+        """Set the kind of a cell inside the grid."""
+        if not (0 <= col < self.width and 0 <= row < self.height):
+            raise IndexError(f"Cell ({col}, {row}) is outside the grid")
+        self.kinds[row * self.width + col] = kind
+
+    def kind_at_point(self, x, y):
+        """Get the kind of the cell containing a pixel position."""
+        return self.kind_at(int(x) // self.tile_size, int(y) // self.tile_size)
+
+    def cell_rect(self, col, row):
+        """Get the pixel rect of a cell."""
+        size = self.tile_size
+        return pygame.Rect(col * size, row * size, size, size)
+
+    def cells_of_kind(self, kind):
+        """Yield (col, row) for every cell of a kind, in row-major order."""
+        kinds = self.kinds
+        index = kinds.find(kind)
+        while index != -1:
+            yield (index % self.width, index // self.width)
+            index = kinds.find(kind, index + 1)
+
+    def cell_range(self, rect):
+        """
+        Get the cells a rect overlaps, clamped to the grid.
+
+        Returns:
+            tuple: (first_col, last_col, first_row, last_row), inclusive.
+            The range is empty (first > last) if the rect misses the grid.
+        """
+        return self._box_range(rect.x, rect.y, rect.width, rect.height)
+
+    def _box_range(self, x, y, width, height):
+        """cell_range for a box given as integers."""
+        if width <= 0 or height <= 0:
+            return (0, -1, 0, -1)
+        size = self.tile_size
+        first_col = max(0, x // size)
+        last_col = min(self.width - 1, (x + width - 1) // size)
+        first_row = max(0, y // size)
+        last_row = min(self.height - 1, (y + height - 1) // size)
+        if first_col > last_col or first_row > last_row:
+            # Box lies entirely outside the grid
+            return (0, -1, 0, -1)
+        return (first_col, last_col, first_row, last_row)
+
+    def _cell_orders(self, rect, kind, after=-1):
+        """Return row-major indices of cells of a kind overlapped by a rect."""
+        first_col, last_col, first_row, last_row = self.cell_range(rect)
+        kinds = self.kinds
+        orders = []
+        for row in range(first_row, last_row + 1):
+            start = row * self.width
+            for index in range(start + first_col, start + last_col + 1):
+                if kinds[index] == kind and index > after:
+                    orders.append(index)
+        return orders
+
+    def query(self, rect, kind=SOLID):
+        """
+        Get the rects of all cells of a kind colliding with a rect.
+
+        Returns:
+            list: pygame.Rect per cell, in row-major order
+        """
+        cells = []
+        for index in self._cell_orders(rect, kind):
+            cell = self.cell_rect(index % self.width, index // self.width)
+            if rect.colliderect(cell):
+                cells.append(cell)
+        return cells
+
+    def collides_any(self, rect, kind=SOLID):
+        """Return True if any cell of a kind collides with the rect."""
+        return self.collides_box(rect.x, rect.y, rect.width, rect.height, kind)
+
+    def collides_box(self, x, y, width, height, kind=SOLID):
+        """
+        collides_any for a box given as numbers, so hot per-frame checks don't
+        have to build a throwaway Rect. Values are truncated the same way
+        pygame.Rect truncates them.
+        """
+        first_col, last_col, first_row, last_row = self._box_range(
+            int(x), int(y), int(width), int(height))
+        kinds = self.kinds
+        for row in range(first_row, last_row + 1):
+            start = row * self.width
+            if kinds.find(kind, start + first_col, start + last_col + 1) != -1:
+                return True
+        return False
+
+    def colliding(self, rect, kind=SOLID):
+        """
+        Iterate over cells of a kind colliding with a rect that may move.
+
+        Behaves like TileIndex.colliding: each cell is tested against the rect
+        as it is when the cell is reached, in the same row-major order that
+        parse_map creates tiles, so results match a linear scan of the tiles.
+
+        Yields:
+            pygame.Rect for each colliding cell
+        """
+        last_order = -1
+        snapshot = None
+        pending = []
+        position = 0
+
+        while True:
+            current = (rect.x, rect.y, rect.width, rect.height)
+            if current != snapshot:
+                # The rect moved (or this is the first pass) - refresh candidates
+                snapshot = current
+                pending = self._cell_orders(rect, kind, after=last_order)
+                position = 0
+
+            if position >= len(pending):
+                return
+
+            last_order = pending[position]
+            position += 1
+            cell = self.cell_rect(last_order % self.width, last_order // self.width)
+            if rect.colliderect(cell):
+                yield cell
@@ -0,0 +1,142 @@
+"""
+Uniform-grid spatial index for level collision.
+
+The index buckets every solid rect (one per tile from parse_map, or the
+merged rectangles from merge_cells) into the grid cells it covers, so
+collision code only has to look at the handful of cells an entity overlaps
+instead of walking every solid in the level each frame.
+"""
+
+
+class TileIndex:
+    """
+    Spatial index over solid rectangles, bucketed into square grid cells.
+
+    Results are always returned in the original list order so that code
+    resolving collisions one solid at a time behaves exactly like a linear
+    scan over the list.
+    """
+    def __init__(self, colliders, cell_size):
+        """
+        Build the index.
+
+        Args:
+            colliders (list): pygame.Rect objects, or objects with a ``rect``
+                attribute such as Tile
+            cell_size (int): Size of a grid cell in pixels, usually TILE_SIZE
+        """
+        self.cell_size = cell_size
+        self.rects = {}  # order -> rect, in insertion order
+        self.orders = {}  # id(rect) -> order
+        self.cells = {}  # (col, row) -> list of (order, rect)
+        self.next_order = 0
+
+        for item in colliders:
+            self.add(item.rect if hasattr(item, 'rect') else item)
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __iter__(self):
+        return iter(self.rects.values())
+
+    def add(self, rect):
+        """
+        Add a solid rect. It sorts after every solid already in the index.
+        Cost is proportional to the number of cells the rect covers.
+        """
+        order = self.next_order
+        self.next_order += 1
+        self.rects[order] = rect
+        self.orders[id(rect)] = order
+        for cell in self._cells_for(rect):
+            self.cells.setdefault(cell, []).append((order, rect))
+
+    def remove(self, rect):
+        """Remove a solid rect previously added (the same Rect object)."""
+        order = self.orders.pop(id(rect))
+        del self.rects[order]
+        for cell in self._cells_for(rect):
+            bucket = [entry for entry in self.cells[cell] if entry[0] != order]
+            if bucket:
+                self.cells[cell] = bucket
+            else:
+                del self.cells[cell]
+
+    def _cells_for(self, rect):
+        """Yield the (col, row) keys of every cell a rect overlaps."""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        size = self.cell_size
+        first_col = rect.left // size
+        last_col = (rect.right - 1) // size
+        first_row = rect.top // size
+        last_row = (rect.bottom - 1) // size
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                yield (col, row)
+
+    def _candidates(self, rect, after=-1):
+        """Return (order, solid) pairs in cells overlapped by rect, in list order."""
+        found = {}
+        for cell in self._cells_for(rect):
+            for order, solid in self.cells.get(cell, ()):
+                if order > after:
+                    found[order] = solid
+        return sorted(found.items())
+
+    def query(self, rect):
+        """
+        Get all solids colliding with a rect.
+
+        Args:
+            rect (pygame.Rect): Area to test
+
+        Returns:
+            list: Colliding pygame.Rect solids, in original list order
+        """
+        return [solid for _, solid in self._candidates(rect) if rect.colliderect(solid)]
+
+    def collides_any(self, rect):
+        """Return True if any solid collides with the rect."""
+        for cell in self._cells_for(rect):
+            for _, solid in self.cells.get(cell, ()):
+                if rect.colliderect(solid):
+                    return True
+        return False
+
+    def colliding(self, rect):
+        """
+        Iterate over solids colliding with a rect that may move during iteration.
+
+        Each solid is tested against the rect as it is at the moment it is
+        reached, exactly like ``for s in solids: if rect.colliderect(s)``.
+        When the caller pushes the rect out of a solid, the remaining
+        candidates are re-queried around its new position.
+
+        Args:
+            rect (pygame.Rect): Rect to test; the same object the caller mutates
+
+        Yields:
+            pygame.Rect solids colliding with the rect, in original list order
+        """
+        last_order = -1
+        snapshot = None
+        pending = []
+        position = 0
+
+        while True:
+            current = (rect.x, rect.y, rect.width, rect.height)
+            if current != snapshot:
+                # The rect moved (or this is the first pass) - refresh candidates
+                snapshot = current
+                pending = self._candidates(rect, after=last_order)
+                position = 0
+
+            if position >= len(pending):
+                return
+
+            last_order, solid = pending[position]
+            position += 1
+            if rect.colliderect(solid):
+                yield solid
@@ -1,6 +1,7 @@
 import pygame
 import os
 from enum import Enum
+from .tilegrid import TileGrid, DEATH, PLAYER_SPAWN, ENEMY_SPAWN, FLYING_SPAWN
 
 class FILETYPE(Enum):
     IMAGE = 0
@@ -14,15 +15,93 @@ def get_file_path(filename, type: FILETYPE):
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         return os.path.join(base_dir, '../assets/audio', filename)
 
+# ======================= SHARED TEXTURE CACHE =======================
+# Converted surfaces keyed by (absolute path, size, use_alpha). Every load_image
+# call goes through here so identical textures are decoded and scaled once per
+# process and shared by all callers. Treat returned surfaces as read-only.
+_texture_cache = {}
+_texture_cache_stats = {"hits": 0, "misses": 0}
+
+def get_texture_cache_stats():
+    """
+    Get texture cache counters.
+
+    Returns:
+        dict: {"hits": int, "misses": int, "entries": int}
+    """
+    return {
+        "hits": _texture_cache_stats["hits"],
+        "misses": _texture_cache_stats["misses"],
+        "entries": len(_texture_cache),
+    }
+
+def clear_texture_cache():
+    """Drop every cached surface and reset the counters."""
+    _texture_cache.clear()
+    _texture_cache_stats["hits"] = 0
+    _texture_cache_stats["misses"] = 0
+
+def register_texture(filename, image, size=None, use_alpha=True):
+    """
+    Put a surface in the texture cache, so load_image returns it for a file
+    instead of decoding it (e.g. a region of a texture atlas).
+
+    Args:
+        filename (str): Path relative to the assets folder (or an absolute path)
+        image (pygame.Surface): Surface to serve for the file
+        size (tuple, optional): (width, height) the surface was scaled to.
+        use_alpha (bool): Whether the surface has per-pixel alpha. Defaults to True.
+    """
+    key = (get_asset_path(filename), tuple(size) if size is not None else None, use_alpha)
+    _texture_cache[key] = image
+
+def get_asset_path(filename):
+    """Get the normalised absolute path of a file in the assets folder."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.normpath(os.path.join(base_dir, '../assets', filename))
+# ===============================================================================
+
 # ======================= IMPROVED IMAGE LOADING =======================
-def load_image(filename, use_alpha=True):
+def load_image(filename, use_alpha=True, size=None):
     """
     Helper function to load images with proper error handling.
+    Images are served from the shared texture cache, so the same file is only
+    decoded (and scaled to a given size) once.
+
+    Args:
+        filename (str): Path relative to the assets folder (or an absolute path)
+        use_alpha (bool): Convert with per-pixel alpha. Defaults to True.
+        size (tuple, optional): (width, height) to scale the image to.
+
     Returns the loaded image or None if loading failed.
     """
+    filepath = get_asset_path(filename)
+    key = (filepath, tuple(size) if size is not None else None, use_alpha)
+
+    image = _texture_cache.get(key)
+    if image is not None:
+        _texture_cache_stats["hits"] += 1
+        return image
+    _texture_cache_stats["misses"] += 1
+
+    if size is not None:
+        # Scale from the cached full-size texture rather than decoding again
+        image = load_image(filename, use_alpha)
+        if image is None:
+            return None
+        image = pygame.transform.scale(image, key[1])
+    else:
+        image = _load_image_file(filename, filepath, use_alpha)
+        if image is None:
+            return None
+
+    _texture_cache[key] = image
+    return image
+
+def _load_image_file(filename, filepath, use_alpha):
+    """Decode and convert an image file, bypassing the cache."""
     try:
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        filepath = os.path.join(base_dir, '../assets', filename)
         
         # Debug output to help identify path issues
         # print(f"Attempting to load image from: {filepath}")
@@ -46,22 +125,37 @@ def load_image(filename, use_alpha=True):
 # ===============================================================================
 
 # ======================= FIXED MAP GENERATION LOGIC =======================
-def parse_map(level_map, tile_size, tile_class):
+def parse_map(level_map, tile_size, tile_class, merge=False, max_merge=None):
     """Parse a level map represented as a list of strings.
     
     Args:
-        level_map (list): List of strings representing the level layout.
+        level_map (list): List of strings representing the level layout,
+            or a TileGrid.
         tile_size (int): Size of each tile in pixels.
-        tile_class (class): Class to use for creating tile objects.
+        tile_class (class): Class to use for creating tile objects. Pass None
+            to skip creating a Tile per cell and get a TileGrid instead.
+        merge (bool, optional): Merge each horizontal run of 'X' cells into a
+            single death zone span instead of one rect per cell. Defaults to False.
+        max_merge (int, optional): Longest merged death zone span in cells.
+            Defaults to None (unbounded).
     
     Returns:
         tuple: Contains:
-            - List of Tile objects
+            - List of Tile objects (one per '#', used for rendering),
+              or the TileGrid if tile_class is None
             - Player spawn position (x, y) or None
             - Enemy spawn positions list [(x, y), (x, y), ...]
             - Flying enemy spawn positions list [(x, y), (x, y), ...]
             - Death zone rectangles list [pygame.Rect, pygame.Rect, ...]
+    
+    Use merge_cells(level_map, tile_size, '#') to get merged collision
+    rectangles for the solid tiles.
     """
+    if tile_class is None:
+        if not isinstance(level_map, TileGrid):
+            level_map = TileGrid.from_map(level_map, tile_size)
+        return _parse_grid(level_map, tile_size, merge, max_merge)
+    
     tiles = []
     player_spawn = None
     enemy_spawns = []
@@ -86,12 +180,102 @@ def parse_map(level_map, tile_size, tile_class):
             elif cell == 'F':
                 # Mark flying enemy spawn position
                 flying_enemy_spawns.append((x, y))
-            elif cell == 'X':
+            elif cell == 'X' and not merge:
                 # Create a death zone rectangle
                 death_zones.append(pygame.Rect(x, y, tile_size, tile_size))
     
+    if merge:
+        # One span per horizontal run of death zone cells
+        death_zones = merge_cells(level_map, tile_size, 'X', merge_rows=False, max_size=max_merge)
+    
     # Return the parsed map elements
     return tiles, player_spawn, enemy_spawns, flying_enemy_spawns, death_zones
+
+def _parse_grid(grid, tile_size, merge, max_merge):
+    """parse_map for a TileGrid - only visits marker cells, never empty space."""
+    def positions(kind):
+        return [(col * tile_size, row * tile_size) for col, row in grid.cells_of_kind(kind)]
+    
+    player_spawns = positions(PLAYER_SPAWN)
+    # Like the list version, the last 'S' in the map wins
+    player_spawn = player_spawns[-1] if player_spawns else None
+    
+    if merge:
+        death_zones = merge_cells(grid, tile_size, 'X', merge_rows=False, max_size=max_merge)
+    else:
+        death_zones = [pygame.Rect(x, y, tile_size, tile_size) for x, y in positions(DEATH)]
+    
+    return grid, player_spawn, positions(ENEMY_SPAWN), positions(FLYING_SPAWN), death_zones
+# ===============================================================================
+
+# ======================= GREEDY RECTANGLE MERGING =======================
+def merge_cells(level_map, tile_size, cell, merge_rows=True, max_size=None):
+    """
+    Greedily merge contiguous cells of one kind into maximal rectangles.
+    
+    Cells are scanned row by row. Each unclaimed cell starts a rectangle that
+    grows right as far as the run goes, then down for as long as every cell
+    below the run is of the same kind and unclaimed.
+    
+    Args:
+        level_map (list): List of strings representing the level layout,
+            or a TileGrid.
+        tile_size (int): Size of each tile in pixels.
+        cell (str): Map character to merge, e.g. '#' or 'X'.
+        merge_rows (bool, optional): Also merge runs across rows. When False
+            the result is one horizontal span per run. Defaults to True.
+        max_size (int, optional): Largest width/height of a rectangle in
+            cells. Bounds the cost of splitting one when a cell is edited.
+            Defaults to None (unbounded).
+    
+    Returns:
+        list: pygame.Rect objects covering exactly the matching cells,
+        ordered by their top-left cell.
+    """
+    # Decode TileGrid rows once up front
+    level_map = list(level_map)
+    height = len(level_map)
+    claimed = [[False] * len(row) for row in level_map]
+    rects = []
+    limit = max_size if max_size is not None else float('inf')
+    
+    for row_index, row in enumerate(level_map):
+        col_index = 0
+        row_width = len(row)
+        while col_index < row_width:
+            if row[col_index] != cell or claimed[row_index][col_index]:
+                col_index += 1
+                continue
+            
+            # Grow right along the run
+            end_col = col_index
+            while (end_col + 1 < row_width and end_col + 1 - col_index < limit
+                   and row[end_col + 1] == cell and not claimed[row_index][end_col + 1]):
+                end_col += 1
+            
+            # Grow down while the whole run continues on the next row
+            end_row = row_index
+            while merge_rows and end_row + 1 < height and end_row + 1 - row_index < limit:
+                below = level_map[end_row + 1]
+                below_claimed = claimed[end_row + 1]
+                if len(below) <= end_col or any(
+                        below[c] != cell or below_claimed[c] for c in range(col_index, end_col + 1)):
+                    break
+                end_row += 1
+            
+            for r in range(row_index, end_row + 1):
+                for c in range(col_index, end_col + 1):
+                    claimed[r][c] = True
+            
+            rects.append(pygame.Rect(
+                col_index * tile_size,
+                row_index * tile_size,
+                (end_col - col_index + 1) * tile_size,
+                (end_row - row_index + 1) * tile_size
+            ))
+            col_index = end_col + 1
+    
+    return rects
 # ===============================================================================
 
 def load_level(level_data, tile_size, tile_class):
@@ -0,0 +1,61 @@
+import pygame
+import pytest
+
+from utils.animationplayer import AnimationPlayer
+
+# One solid colour per frame, so the drawn frame can be told from its pixels
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+
+def make_frames():
+    frames = []
+    for color in COLORS:
+        frame = pygame.Surface((2, 2))
+        frame.fill(color)
+        frames.append(frame)
+    return frames
+
+
+def drawn_frame(player):
+    surface = pygame.Surface((2, 2))
+    player.draw(surface, (0, 0))
+    return COLORS.index(tuple(surface.get_at((0, 0)))[:3])
+
+
+@pytest.fixture
+def ticks(monkeypatch):
+    """Control pygame.time.get_ticks() through now[0]."""
+    now = [0]
+    monkeypatch.setattr(pygame.time, "get_ticks", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def player():
+    player = AnimationPlayer(shared_clock={"walking"})
+    # Both loop, like the enemy's walk and attack sheets; 100ms per frame
+    player.add_animation("walking", make_frames())
+    player.add_animation("attack", make_frames())
+    return player
+
+
+def test_attack_starts_at_first_frame_whatever_the_clock(ticks, player):
+    ticks[0] = 250
+    player.play("walking")
+    ticks[0] = 1234
+    player.play("attack")
+    assert drawn_frame(player) == 0
+    ticks[0] = 1334
+    assert drawn_frame(player) == 1
+
+
+def test_walking_follows_the_shared_clock(ticks, player):
+    ticks[0] = 250
+    player.play("walking")
+    assert drawn_frame(player) == 2
+
+    other = AnimationPlayer(shared_clock={"walking"})
+    other.add_animation("walking", player.animations["walking"].frames)
+    ticks[0] = 310
+    other.play("walking")
+    assert drawn_frame(other) == drawn_frame(player) == 3